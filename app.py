@@ -1,19 +1,42 @@
+import os
 import uuid
 import json
-from datetime import datetime
+import hmac
+import hashlib
+import time
+import threading
+import atexit
+import click
+from io import BytesIO
+from datetime import datetime, timedelta, timezone
 from functools import wraps
 from enum import Enum
 
-from flask import Flask, render_template, request, redirect, url_for, session, flash, send_file
+from flask import Flask, Response, abort, jsonify, render_template, request, redirect, url_for, session, flash, send_file
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy import func, desc
+from jinja2 import FileSystemBytecodeCache
+from sqlalchemy import func, desc, inspect, insert
+from sqlalchemy.exc import IntegrityError
 
 from scripts.criteriatable import CriteriaTable
 from scripts.incrementstable import IncrementsTable
-from scripts.table_handler import TableHandler
-
-from scripts.download_handler import download_applicant_data, download_CAR
-from scripts.path import JSON_PATH
+from scripts.table_handler import TABLES, PATHS, TableHandler
+from scripts.struct_cache import STRUCTS, STRUCT_FIELDS, DefaultStructures
+from scripts.template_cache import TEMPLATES
+from scripts.leaderboard import LEADERBOARDS, Leaderboard
+from scripts.ranking_events import EVENTS
+from scripts.metrics import METRICS
+from scripts.query_guard import QUERY_GUARD
+
+from scripts.sqlite_profile import sqlite_pragmas, apply_sqlite_profile
+from scripts.download_handler import download_CAR, rating_sheet_context, render_rating_sheet
+from scripts.document_cache import DOCUMENTS, fingerprint
+from scripts.bulk_export import stream_rating_sheets
+from scripts.job_queue import JOBS, ProgressThrottle
+from scripts.token_generator import MAX_TOKENS_PER_BATCH, random_tokens, tokens_csv
+from scripts.applicant_import import IMPORT_CHUNK_SIZE, RAW_COLUMNS, chunked, parse_applicant_row, read_applicant_rows
+from scripts.path import DOC_PATH
+from scripts.debugger import log, get_log_info, configure_logging, install_request_logging
 
 from datetime import datetime
 
@@ -21,17 +44,60 @@ app = Flask(__name__)
 app.config["SECRET_KEY"] = "super-secret-key"  # Change for production!
 app.config["SQLALCHEMY_DATABASE_URI"] = "sqlite:///interviews.db"
 app.config["SQLALCHEMY_TRACK_MODIFICATIONS"] = False
+# SQLite connection tuning, see scripts/sqlite_profile.py ("concurrent" or "compat")
+app.config["SQLITE_PROFILE"] = "concurrent"
+app.config["SQLITE_BUSY_TIMEOUT"] = 5000  # ms a writer waits for a lock before "database is locked"
+app.config["SQLITE_PRAGMAS"] = {}         # per-pragma overrides, e.g. {"mmap_size": 0}
+# worker processes used to render bulk RATING-SHEET exports (None = cpu count - 1, at most 4)
+app.config["EXPORT_WORKERS"] = None
+# background document jobs running at the same time, and how long finished jobs are kept
+app.config["JOB_WORKERS"] = 1
+app.config["JOB_RETENTION_HOURS"] = 24
+# queued and running jobs are marked alive every JOB_HEARTBEAT_SECONDS by the process that runs them;
+# a job not marked for JOB_STALE_SECONDS belonged to a process that stopped and is failed
+app.config["JOB_HEARTBEAT_SECONDS"] = 15
+app.config["JOB_STALE_SECONDS"] = 60
+# rendered document cache: memory budget, optional shared directory and its budget
+app.config["DOC_CACHE_MAX_BYTES"] = 64 * 1024 * 1024
+app.config["DOC_CACHE_DIR"] = None
+app.config["DOC_CACHE_DISK_MAX_BYTES"] = 512 * 1024 * 1024
+# keys accepted in the X-API-Key header of the read-only /api/v1 endpoints (admins need none);
+# FLASK_API_KEYS takes a comma-separated list
+app.config["API_KEYS"] = []
+# live ranking on the interview page: Server-Sent Events hold one worker per open page, so enable
+# them only with threaded or async workers (flask run, gunicorn -k gthread/gevent); otherwise the
+# page polls the interview revision every LIVE_RANKING_POLL_SECONDS
+app.config["LIVE_RANKING_SSE"] = False
+app.config["LIVE_RANKING_POLL_SECONDS"] = 10
+# per-route latency, SQL and document render metrics served at /admin/metrics (off: no hooks installed)
+app.config["METRICS_ENABLED"] = False
+# development/tests: report statements repeated QUERY_GUARD_REPEATS times in one request (N+1 queries)
+# and requests over QUERY_BUDGET statements; QUERY_BUDGET_STRICT raises instead, failing the test
+app.config["QUERY_GUARD"] = False
+app.config["QUERY_GUARD_REPEATS"] = 10
+app.config["QUERY_BUDGET"] = None
+app.config["QUERY_BUDGET_STRICT"] = False
+# logging: level, "console" (colored) or "json" (JSON lines with request ids and durations),
+# optional file instead of stderr, one line per request, and records buffered before dropping
+app.config["LOG_LEVEL"] = "INFO"
+app.config["LOG_FORMAT"] = "console"
+app.config["LOG_FILE"] = None
+app.config["LOG_REQUESTS"] = False
+app.config["LOG_QUEUE_SIZE"] = 10000
+# compiled page templates shared by all workers (None = instance/jinja_cache, "" = off), and
+# whether create_app() loads templates, tables and structures before the first request
+app.config["TEMPLATE_CACHE_DIR"] = None
+app.config["WARM_UP"] = True
+# FLASK_<KEY> environment variables override the values above, e.g. FLASK_SQLITE_PROFILE=compat
+app.config.from_prefixed_env()
 db = SQLAlchemy(app)
 
 # TO-DO
 # SG LEVEL
 # contact number email
 
-try:
-    fp = open(f'{JSON_PATH}/eval_struct.json', 'r+') 
-    EVAL_STRUCTURE = json.load(fp)
-except Exception as e:
-    EVAL_STRUCTURE = {
+# built-in default structures of new interviews, used when the struct_json/ file is missing or invalid
+DEFAULT_EVAL_STRUCTURE = {
     "teacher 1" : {"Behavior Interview" : {"CATEGORY" : {
                         "aptitude" : 1,
                         "characteristics" : 1,
@@ -95,14 +161,8 @@ except Exception as e:
                     }, "TOTAL" : 10, "WEIGHT" : 10}
                     }
     }                 
-    with open(f'{JSON_PATH}/eval_struct.json', 'w+') as fp:
-        json.dump(EVAL_STRUCTURE, fp, indent=4)
-
-try:
-    fp = open(f'{JSON_PATH}/weight_struct.json', 'r+')
-    WEIGHT_STRUCTURE = json.load(fp)
-except Exception as e:
-    WEIGHT_STRUCTURE = {
+
+DEFAULT_WEIGHT_STRUCTURE = {
                         "teacher 1" : {
                             "education" : 10,
                             "experience" : 10,
@@ -129,14 +189,8 @@ except Exception as e:
                             "training" : 10
                         }
                     }
-    with open(f'{JSON_PATH}/weight_struct.json', 'w+') as fp:
-        json.dump(WEIGHT_STRUCTURE, fp, indent=4)
-
-try:
-    fp = open(f'{JSON_PATH}/applicant_struct1.json', 'r+')
-    APPLICANT_STRUCTURE = json.load(fp)
-except Exception as e:
-    APPLICANT_STRUCTURE = {
+
+DEFAULT_APPLICANT_STRUCTURE = {
                             "teacher 1" : {
                                 "lpt_rating" : {"WEIGHT" : 10, "MAX_SCORE" : 100, "LABEL" : "LPT/PBET/LEPT Rating"},
                                 "cot" : {"WEIGHT" : 35, "MAX_SCORE" : 30, "LABEL" : "COT"},
@@ -167,15 +221,22 @@ except Exception as e:
                             }
 
                         }
-    with open(f'{JSON_PATH}/applicant_struct.json', 'w+') as fp:
-        json.dump(APPLICANT_STRUCTURE, fp, indent=4)
-            
+
+STRUCTURES = DefaultStructures({
+    "eval_struct"   : DEFAULT_EVAL_STRUCTURE,
+    "app_struct"    : DEFAULT_APPLICANT_STRUCTURE,
+    "weight_struct" : DEFAULT_WEIGHT_STRUCTURE,
+})
 
 # ------------------------------------------------------------------------------
 # MODELS
 # ------------------------------------------------------------------------------
 class Interview(db.Model):
     __tablename__ = "interviews"
+    __table_args__ = (
+        # admin dashboard pages: one status, newest first
+        db.Index("ix_interviews_status_date", "status", "date", "id"),
+    )
 
     id              = db.Column(db.UnicodeText, primary_key=True)
     date            = db.Column(db.Date, nullable=False)
@@ -200,6 +261,10 @@ class Interview(db.Model):
     app_struct   = db.Column(db.UnicodeText)
     eval_struct   = db.Column(db.UnicodeText)
     status          = db.Column(db.String(7))
+    # last change to the interview or its rows and the number of committed
+    # changes, see touch_interviews()
+    updated_at      = db.Column(db.DateTime, nullable=True)
+    revision        = db.Column(db.Integer, nullable=False, default=0, server_default="0")
 
     # ORM cascades + passive_deletes so we don't have to loop & delete children manually
     evaluator_tokens = db.relationship(
@@ -224,6 +289,9 @@ class Interview(db.Model):
 
 class EvaluatorToken(db.Model):
     __tablename__ = "evaluator_tokens"
+    __table_args__ = (
+        db.Index("ix_evaluator_tokens_interview", "interview_id"),
+    )
 
     token        = db.Column(db.String(8), primary_key=True)
     interview_id = db.Column(
@@ -242,6 +310,9 @@ class EvaluatorToken(db.Model):
 
 class Applicant(db.Model):
     __tablename__ = "applicants"
+    __table_args__ = (
+        db.Index("ix_applicants_interview", "interview_id"),
+    )
 
     code           = db.Column(db.UnicodeText, primary_key=True)
     interview_id   = db.Column(
@@ -264,10 +335,22 @@ class Applicant(db.Model):
                        "Interview",
                        back_populates="applicants"
                      )
+    score          = db.relationship(
+                       "ApplicantScore",
+                       uselist=False,
+                       cascade="all, delete-orphan"
+                     )
 
 
 class Evaluation(db.Model):
     __tablename__ = "evaluations"
+    __table_args__ = (
+        # one evaluation per evaluator and applicant; also serves evaluator lookups
+        db.Index("uq_evaluations_interview_evaluator_applicant",
+                 "interview_id", "evaluator_token", "applicant_code", unique=True),
+        # per-applicant averaging (calculate_applicant_score, applicant_detail)
+        db.Index("ix_evaluations_interview_applicant", "interview_id", "applicant_code"),
+    )
 
     id               = db.Column(db.Integer, primary_key=True)
     interview_id     = db.Column(
@@ -291,58 +374,602 @@ class Evaluation(db.Model):
                          "Interview",
                          back_populates="evaluations"
                        )
+    scores           = db.relationship(
+                         "EvaluationScore",
+                         cascade="all, delete-orphan",
+                         passive_deletes=True
+                       )
     # (optionally, add relationships to EvaluatorToken & Applicant if you need them)
 
+
+class EvaluationScore(db.Model):
+    """
+    One criterion score of an evaluation, the normalized form of
+    Evaluation.extra_data used for SUM/GROUP BY aggregates.
+    """
+    __tablename__ = "evaluation_scores"
+    __table_args__ = (
+        db.Index("uq_evaluation_scores_criterion", "evaluation_id", "section", "criterion", unique=True),
+    )
+
+    id               = db.Column(db.Integer, primary_key=True)
+    evaluation_id    = db.Column(
+                         db.Integer,
+                         db.ForeignKey("evaluations.id", ondelete="CASCADE"),
+                         nullable=False
+                       )
+    section          = db.Column(db.UnicodeText, nullable=False)
+    criterion        = db.Column(db.UnicodeText, nullable=False)
+    score            = db.Column(db.Float, nullable=False)
+
+
+class ApplicantScore(db.Model):
+    """
+    Materialized scores of one applicant, kept in sync by refresh_scores()
+    so rankings are read with a single ORDER BY instead of being recomputed.
+    """
+    __tablename__ = "applicant_scores"
+    __table_args__ = (
+        db.Index("ix_applicant_scores_ranking", "interview_id", "total_score"),
+    )
+
+    applicant_code   = db.Column(
+                         db.UnicodeText,
+                         db.ForeignKey("applicants.code", ondelete="CASCADE"),
+                         primary_key=True
+                       )
+    interview_id     = db.Column(
+                         db.String(8),
+                         db.ForeignKey("interviews.id", ondelete="CASCADE"),
+                         nullable=False
+                       )
+    score_edu        = db.Column(db.Integer, nullable=False)
+    score_exp        = db.Column(db.Integer, nullable=False)
+    score_trn        = db.Column(db.Integer, nullable=False)
+    extra_total      = db.Column(db.Float, nullable=False)
+    eval_score       = db.Column(db.Float, nullable=False)
+    total_score      = db.Column(db.Float, nullable=False)
+
+class DocumentJob(db.Model):
+    """A CAR or bulk rating sheet export generated in the background (see scripts/job_queue.py)."""
+    __tablename__ = "document_jobs"
+
+    id               = db.Column(db.String(32), primary_key=True)
+    interview_id     = db.Column(
+                         db.String(8),
+                         db.ForeignKey("interviews.id", ondelete="CASCADE"),
+                         nullable=False,
+                         index=True
+                       )
+    kind             = db.Column(db.String(32), nullable=False)
+    status           = db.Column(db.String(8), nullable=False, default="queued")
+    progress         = db.Column(db.Integer, nullable=False, default=0)
+    total            = db.Column(db.Integer, nullable=False, default=0)
+    error            = db.Column(db.Text, nullable=True)
+    created          = db.Column(db.DateTime, nullable=False)
+    finished         = db.Column(db.DateTime, nullable=True)
+    file_name        = db.Column(db.UnicodeText, nullable=True)
+    # last time the process running the job marked it alive (see JobQueue.heartbeat)
+    heartbeat        = db.Column(db.DateTime, nullable=True)
+    # only loaded when the file is downloaded, not on every status poll
+    result           = db.deferred(db.Column(db.LargeBinary, nullable=True))
+
+
+# rows that belong to an interview and show up in its pages and the read API
+VERSIONED_MODELS = (Interview, Applicant, ApplicantScore, Evaluation, EvaluatorToken)
+
+def touch_interviews(session, iids):
+    """
+    Sets Interview.updated_at of the given interviews and counts up their
+    revision, once per transaction, in the session's transaction.
+    """
+    touched = session.info.setdefault("touched_interviews", set())
+    iids = set(iids) - touched
+    if iids:
+        session.connection().execute(
+            Interview.__table__.update().where(Interview.id.in_(iids)).values(
+                updated_at=datetime.now(), revision=Interview.__table__.c.revision + 1
+            )
+        )
+        touched |= iids
+
+@db.event.listens_for(db.session, "after_commit")
+@db.event.listens_for(db.session, "after_rollback")
+def reset_touched_interviews(session):
+    session.info.pop("touched_interviews", None)
+
+@db.event.listens_for(db.session, "after_flush")
+def touch_changed_interviews(session, flush_context):
+    """Keeps Interview.updated_at current for every flushed change to an interview's rows."""
+    iids = set()
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if isinstance(obj, VERSIONED_MODELS):
+            # loaded values only, so deleted or expired rows are never refreshed here
+            iid = inspect(obj).dict.get("id" if isinstance(obj, Interview) else "interview_id")
+            if iid is not None:
+                iids.add(iid)
+    touch_interviews(session, iids)
+
 # ------------------------------------------------------------------------------
 # Calculation HELPER
 # ------------------------------------------------------------------------------
 
-def calculate_baseline_score(applicant : Applicant, interview: Interview) -> dict[str, int]:
-        crit = CriteriaTable()
-        incs = IncrementsTable()
-        
-        weight_struct = json.loads(interview.weight_struct)
-        delta_edu = crit.get_score(applicant.raw_edu, interview.base_edu)
-        delta_exp = crit.get_score(applicant.raw_exp, interview.base_exp)
-        delta_trn = crit.get_score(applicant.raw_trn, interview.base_trn)
+def calculate_baseline_scores(applicants: list[Applicant], interview: Interview) -> list[dict[str, int]]:
+    """
+    Baseline (education/experience/training) points for several applicants of
+    the same interview; the weight structure and increments tables are resolved once.
+    """
+    crit = CriteriaTable()
+    incs = IncrementsTable()
+    th = TableHandler()
 
-        inc_edu = (weight_struct['education'] // 5)
-        inc_exp = (weight_struct['experience'] // 5)
-        inc_trn = (weight_struct['training'] // 5)
+    weight_struct = STRUCTS.get(interview, "weight_struct")
+    inc_edu = (weight_struct['education'] // 5)
+    inc_exp = (weight_struct['experience'] // 5)
+    inc_trn = (weight_struct['training'] // 5)
 
-        applicant_score = {}
+    edu = incs.get_scores([crit.get_score(a.raw_edu, interview.base_edu) for a in applicants], th.parse_table("increments", "education"))
+    exp = incs.get_scores([crit.get_score(a.raw_exp, interview.base_exp) for a in applicants], th.parse_table("increments", "experience"))
+    trn = incs.get_scores([crit.get_score(a.raw_trn, interview.base_trn) for a in applicants], th.parse_table("increments", "training"))
 
-        applicant_score['edu'] = (incs.get_score(delta_edu, TableHandler().parse_table("increments", "education")) // 2) * inc_edu
-        applicant_score['exp'] = (incs.get_score(delta_exp, TableHandler().parse_table("increments", "experience")) // 2) * inc_exp
-        applicant_score['trn'] = (incs.get_score(delta_trn, TableHandler().parse_table("increments", "training")) // 2) * inc_trn
+    return [{'edu' : (e // 2) * inc_edu, 'exp' : (x // 2) * inc_exp, 'trn' : (t // 2) * inc_trn}
+            for e, x, t in zip(edu, exp, trn)]
 
-        return applicant_score
+def calculate_baseline_score(applicant : Applicant, interview: Interview) -> dict[str, int]:
+        return calculate_baseline_scores([applicant], interview)[0]
+
+def build_score_rows(evaluation_id: int, extra_data: dict) -> list[dict]:
+    """Normalized evaluation_scores rows for an evaluation's {section: {criterion: score}} data."""
+    return [{"evaluation_id" : evaluation_id, "section" : section, "criterion" : criterion, "score" : score}
+            for section, criteria in extra_data.items()
+            for criterion, score in criteria.items()]
+
+def write_evaluation_scores(evaluation, extra_data: dict):
+    """
+    Replaces the score rows of an evaluation with one DELETE and one
+    multi-row INSERT. As ORM objects the rows would be inserted one by one
+    (SQLite needs RETURNING for their ids), i.e. one statement per criterion.
+    The evaluation is flushed first for its id; the caller commits.
+    """
+    new = evaluation.id is None
+    db.session.flush()
+    if not new:
+        db.session.execute(db.delete(EvaluationScore).where(EvaluationScore.evaluation_id == evaluation.id))
+    rows = build_score_rows(evaluation.id, extra_data)
+    if rows:
+        db.session.execute(insert(EvaluationScore), rows)
+    db.session.expire(evaluation, ["scores"])
+
+# digits kept of summed criterion scores: SQL adds them in whatever order it reads the rows, and
+# float sums in a different order differ in the last bits, which round(..., 2) can turn into 0.01
+SCORE_SUM_DIGITS = 6
+
+def score_sum(total: float) -> float:
+    """A sum of criterion scores, independent of the order it was added up in."""
+    return round(total, SCORE_SUM_DIGITS)
+
+def evaluation_section_totals(iid: str, codes: list[str] = None) -> dict[str, tuple[int, dict[str, float]]]:
+    """
+    Sums every applicant's criterion scores per section in SQL.
+    Returns {applicant code: (number of evaluations, {section: total})}.
+    """
+    query = db.session.query(
+        Evaluation.applicant_code,
+        EvaluationScore.section,
+        func.sum(EvaluationScore.score),
+        func.count(func.distinct(Evaluation.id))
+    ).join(EvaluationScore, EvaluationScore.evaluation_id == Evaluation.id).filter(Evaluation.interview_id == iid)
+    if codes is not None:
+        query = query.filter(Evaluation.applicant_code.in_(codes))
+
+    totals = {}
+    for code, section, total, count in query.group_by(Evaluation.applicant_code, EvaluationScore.section):
+        count_before, sections = totals.get(code, (0, {}))
+        sections[section] = score_sum(total)
+        totals[code] = (max(count_before, count), sections)
+    return totals
+
+def evaluation_overalls(iid: str, token: str, key=Evaluation.id) -> dict:
+    """
+    Overall (sum of all criteria) of each evaluation an evaluator submitted,
+    keyed by evaluation id or by another Evaluation column such as applicant_code.
+    """
+    query = db.session.query(key, func.sum(EvaluationScore.score)).join(
+        EvaluationScore, EvaluationScore.evaluation_id == Evaluation.id
+    ).filter(Evaluation.interview_id == iid, Evaluation.evaluator_token == token).group_by(Evaluation.id)
+    return {k: round(score_sum(total), 2) for k, total in query}
+
+def score_applicants(applicants: list[Applicant], interview: Interview, section_totals: dict[str, tuple[int, dict[str, float]]], eval_struct=None) -> dict[str, dict]:
+    """
+    Scores applicants of one interview from rows that are already loaded and
+    the per-section evaluation totals of evaluation_section_totals().
+
+    Every entry holds the baseline points, the extra (applicant structure)
+    scores, the per-section evaluation averages and the totals, rounded the
+    same way as calculate_applicant_score always has.
+    """
+    if eval_struct is None:
+        eval_struct = STRUCTS.get(interview, "eval_struct")
+
+    scores = {}
+    for applicant, baseline in zip(applicants, calculate_baseline_scores(applicants, interview)):
+        total_score = baseline['edu'] + baseline['exp'] + baseline['trn']
+
+        extra = json.loads(applicant.extra_data)
+        for field in extra.keys():
+            total_score += extra[field]
+
+        count, sections = section_totals.get(applicant.code, (0, {}))
+        evaluation = {}
+        eval_score = 0
+        if count:
+            for key in eval_struct.keys():
+                total = sections.get(key, 0)
+                evaluation[key] = round(((total / eval_struct[key]['TOTAL']) * eval_struct[key]['WEIGHT']) / count, 2)
+                eval_score += evaluation[key]
+            total_score += eval_score
+
+        scores[applicant.code] = {
+            'baseline' : baseline,
+            'extra' : extra,
+            'extra_total' : sum(extra.values()),
+            'evaluation' : evaluation,
+            'eval_score' : eval_score,
+            'total_score' : total_score,
+        }
+    return scores
+
+def refresh_scores(interview: Interview, applicants: list[Applicant] = None) -> dict[str, dict]:
+    """
+    Recomputes the materialized ApplicantScore rows of the given applicants,
+    or of the whole interview when no applicants are given. The caller commits.
+    """
+    if applicants is None:
+        applicants = Applicant.query.filter_by(interview_id=interview.id).all()
+        section_totals = evaluation_section_totals(interview.id)
+        existing = ApplicantScore.query.filter_by(interview_id=interview.id).all()
+    else:
+        codes = [a.code for a in applicants]
+        section_totals = evaluation_section_totals(interview.id, codes)
+        existing = ApplicantScore.query.filter(ApplicantScore.applicant_code.in_(codes)).all()
+
+    rows = {row.applicant_code: row for row in existing}
+    scores = score_applicants(applicants, interview, section_totals)
+    for applicant in applicants:
+        score = scores[applicant.code]
+        row = rows.get(applicant.code)
+        if row is None:
+            row = ApplicantScore(applicant_code=applicant.code)
+            db.session.add(row)
+        row.interview_id = interview.id
+        row.score_edu    = score['baseline']['edu']
+        row.score_exp    = score['baseline']['exp']
+        row.score_trn    = score['baseline']['trn']
+        row.extra_total  = score['extra_total']
+        row.eval_score   = score['eval_score']
+        row.total_score  = score['total_score']
+    return scores
+
+def get_interview_ranking(interview: Interview) -> list[tuple[Applicant, ApplicantScore]]:
+    """
+    Applicants of an interview with their materialized scores, best first.
+    Applicants without a score row yet (e.g. databases created before the
+    score table existed) trigger a one-off recompute of the interview.
+    """
+    query = db.session.query(Applicant, ApplicantScore).outerjoin(
+        ApplicantScore, ApplicantScore.applicant_code == Applicant.code
+    ).filter(Applicant.interview_id == interview.id).order_by(
+        ApplicantScore.total_score.desc(), Applicant.code
+    )
+    ranking = query.all()
+    if any(score is None for _, score in ranking):
+        refresh_scores(interview)
+        db.session.commit()
+        ranking = query.all()
+    return ranking
+
+def interview_leaderboard(interview: Interview) -> Leaderboard:
+    """This worker's leaderboard of an interview, rebuilt from the materialized scores when stale."""
+    return LEADERBOARDS.get(interview, lambda: [(applicant.code, score.total_score)
+                                                for applicant, score in get_interview_ranking(interview)])
+
+def commit_scores(interview: Interview, scores: dict[str, dict]):
+    """
+    Commits the session, applies the new scores ({applicant code: entry of
+    refresh_scores(), or None for a deleted applicant}) to this worker's
+    leaderboard and pushes them to the admin pages following the interview.
+    """
+    db.session.flush()
+    revision = db.session.query(Interview.revision).filter_by(id=interview.id).scalar()
+    db.session.commit()
+    LEADERBOARDS.apply(interview.id, revision, {code: score and score['total_score'] for code, score in scores.items()})
+
+    if EVENTS.has_subscribers(interview.id):
+        board = interview_leaderboard(interview)
+        for code, score in scores.items():
+            EVENTS.publish(interview.id, "score", {
+                'code' : code,
+                'eval_score' : score and score['eval_score'],
+                'total_score' : score and score['total_score'],
+                'rank' : board.rank(code),
+            }, revision)
 
 def calculate_applicant_score(applicant_data : Applicant, eval_struct):
-    eval_records = Evaluation.query.filter_by(
-         interview_id=applicant_data.interview_id,
-         applicant_code=applicant_data.code
-    ).all()
-    applicant_data_score = calculate_baseline_score(applicant_data, applicant_data.interview)
-    total_score = applicant_data_score['edu'] +applicant_data_score['exp'] + applicant_data_score['trn']
-    
-    app_json = json.loads(applicant_data.extra_data)
-    eval_score = 0
-    for field in app_json.keys():
-        total_score += app_json[field]
+    section_totals = evaluation_section_totals(applicant_data.interview_id, [applicant_data.code])
+    score = score_applicants([applicant_data], applicant_data.interview, section_totals, eval_struct)[applicant_data.code]
+    return score['total_score'], score['eval_score']
+
+# ------------------------------------------------------------------------------
+# Dashboard HELPER
+# ------------------------------------------------------------------------------
+
+DASHBOARD_PAGE_SIZE = 25
+
+def interview_page(status: str, q: str = "", after: str = None, size: int = DASHBOARD_PAGE_SIZE) -> tuple[list[Interview], str]:
+    """
+    One page of interviews with the given status, newest first, optionally
+    searched by position title or ID. Pages are keyset-paginated on
+    (date, id): `after` is the cursor returned with the previous page
+    ("<date>_<id>"), and the returned cursor is None on the last page.
+    """
+    query = Interview.query.filter(Interview.status == status)
+    if q:
+        query = query.filter(db.or_(Interview.position_title.ilike(f"%{q}%"), Interview.id == q.upper()))
+    if after:
+        try:
+            date_str, last_id = after.split("_", 1)
+            last_date = datetime.strptime(date_str, "%Y-%m-%d").date()
+        except ValueError:
+            last_date = None
+        if last_date is not None:
+            query = query.filter(db.or_(
+                Interview.date < last_date,
+                db.and_(Interview.date == last_date, Interview.id < last_id)
+            ))
+    interviews = query.order_by(Interview.date.desc(), Interview.id.desc()).limit(size + 1).all()
+    if len(interviews) <= size:
+        return interviews, None
+    interviews = interviews[:size]
+    return interviews, f"{interviews[-1].date.isoformat()}_{interviews[-1].id}"
+
+def interview_counts(iids: list[str]) -> dict[str, dict[str, int]]:
+    """Applicant and evaluator token counts of the given interviews, two grouped queries in total."""
+    counts = {iid: {'applicants' : 0, 'tokens' : 0} for iid in iids}
+    if not iids:
+        return counts
+    for key, model in (('applicants', Applicant), ('tokens', EvaluatorToken)):
+        rows = db.session.query(model.interview_id, func.count()).filter(
+            model.interview_id.in_(iids)
+        ).group_by(model.interview_id)
+        for iid, count in rows:
+            counts[iid][key] = count
+    return counts
+
+# ------------------------------------------------------------------------------
+# Import HELPER
+# ------------------------------------------------------------------------------
+
+def import_applicants(interview: Interview, rows, chunk_size: int = IMPORT_CHUNK_SIZE) -> tuple[int, list[str]]:
+    """
+    Adds the applicants of read_applicant_rows() to an interview in chunks:
+    each chunk is validated, checked for existing codes with one query,
+    scored in one batch and written with one bulk INSERT per table.
+
+    Invalid rows are skipped and reported as "row N: reason"; everything
+    else is imported. Runs in the caller's transaction, the caller commits.
+    """
+    th = TableHandler()
+    app_struct = STRUCTS.get(interview, "app_struct")
+    labels = {field: th.parse_table("table", field) for field in RAW_COLUMNS}
+    imported = 0
+    errors = []
+    seen = set()
+
+    for chunk in chunked(rows, chunk_size):
+        values = {}
+        # (line, reason): the existing-code check runs after validation, the report is in row order
+        rejected = []
+        for line, row in chunk:
+            try:
+                applicant = parse_applicant_row(row, app_struct, labels)
+            except ValueError as e:
+                rejected.append((line, str(e)))
+                continue
+            if applicant["code"] in seen:
+                rejected.append((line, f"applicant code {applicant['code']} appears more than once"))
+                continue
+            seen.add(applicant["code"])
+            applicant["interview_id"] = interview.id
+            values[line] = applicant
+
+        codes = [applicant["code"] for applicant in values.values()]
+        existing = {code for (code,) in db.session.query(Applicant.code).filter(Applicant.code.in_(codes))}
+        for line, applicant in list(values.items()):
+            if applicant["code"] in existing:
+                rejected.append((line, f"applicant code {applicant['code']} already exists"))
+                del values[line]
+        errors.extend(f"row {line}: {reason}" for line, reason in sorted(rejected))
+        if not values:
+            continue
+
+        # new applicants have no evaluations yet, so no section totals to load
+        applicants = [Applicant(**applicant) for applicant in values.values()]
+        scores = score_applicants(applicants, interview, {})
+        db.session.execute(insert(Applicant), list(values.values()))
+        db.session.execute(insert(ApplicantScore), [{
+            'applicant_code' : a.code,
+            'interview_id' : interview.id,
+            'score_edu' : scores[a.code]['baseline']['edu'],
+            'score_exp' : scores[a.code]['baseline']['exp'],
+            'score_trn' : scores[a.code]['baseline']['trn'],
+            'extra_total' : scores[a.code]['extra_total'],
+            'eval_score' : scores[a.code]['eval_score'],
+            'total_score' : scores[a.code]['total_score'],
+        } for a in applicants])
+        imported += len(applicants)
+    if imported:
+        # bulk statements skip the flush events that normally do this
+        touch_interviews(db.session, [interview.id])
+    return imported, errors
+
+# ------------------------------------------------------------------------------
+# Token HELPER
+# ------------------------------------------------------------------------------
+
+def create_evaluator_tokens(iid: str, count: int) -> list[str]:
+    """
+    Adds `count` new evaluator tokens to an interview with one bulk INSERT.
+    Candidates are checked against the stored tokens in one query per round;
+    the (rare) collisions are replaced in another round. The caller commits.
+    """
+    tokens = set()
+    while len(tokens) < count:
+        candidates = random_tokens(count - len(tokens), exclude=tokens)
+        taken = {token for (token,) in db.session.query(EvaluatorToken.token).filter(EvaluatorToken.token.in_(candidates))}
+        tokens |= candidates - taken
+    tokens = sorted(tokens)
+    db.session.execute(insert(EvaluatorToken), [{'token' : tk, 'interview_id' : iid, 'registered' : False} for tk in tokens])
+    touch_interviews(db.session, [iid])
+    return tokens
+
+# ------------------------------------------------------------------------------
+# Document HELPER
+# ------------------------------------------------------------------------------
+
+DOCX_MIMETYPE = 'application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+
+# background document kinds -> download name suffix
+JOB_KINDS = {
+    "car_with_name" : "CAR_with_name.docx",
+    "car_without_name" : "CAR_without_name.docx",
+    "rating_sheets" : "RATING-SHEETS.zip",
+}
+
+def build_car_data(interview_data: Interview) -> dict[str, list]:
+    """Ranked column lists for download_CAR, read from the materialized scores."""
+    applicant_data = {
+        'code' : [],
+        'name' : [],
+        'score' : [],
+        'eval_score' : [],
+        'total_score' : [],
+    }
+
+    for applicant, score in get_interview_ranking(interview_data):
+        applicant_data['code'].append(applicant.code)
+        applicant_data['name'].append(applicant.name)
+        applicant_data['score'].append([score.score_edu, score.score_exp, score.score_trn] + list(json.loads(applicant.extra_data).values()))
+        applicant_data['eval_score'].append(score.eval_score)
+        applicant_data['total_score'].append(score.total_score)
+    return applicant_data
+
+def build_rating_sheet_jobs(interview_data: Interview) -> tuple[list[tuple], list[str]]:
+    """
+    (file name, interview type, context) of every applicant's RATING-SHEET,
+    plus the applicants that could not be prepared. Contexts are built here;
+    worker processes only render.
+    """
+    app_struct = STRUCTS.get(interview_data, "app_struct")
+    jobs = []
+    errors = []
+    for applicant, score in get_interview_ranking(interview_data):
+        name = f'APPLICANT {applicant.code}_DETAILS.docx'
+        baseline = {'edu' : score.score_edu, 'exp' : score.score_exp, 'trn' : score.score_trn}
+        try:
+            context = rating_sheet_context(applicant, baseline, interview_data, score.eval_score, score.total_score, app_struct)
+        except KeyError as e:
+            get_log_info("ERROR", "%s: no label for %s", "build_rating_sheet_jobs", name, e)
+            errors.append(f"{name}: no label for {e}")
+            continue
+        jobs.append((name, str(interview_data.type), context))
+    return jobs, errors
+
+def not_modified(etag: str) -> Response:
+    response = Response(status=304)
+    response.set_etag(etag)
+    return response
+
+def document_job_payload(job: "DocumentJob") -> dict:
+    return {
+        "id" : job.id,
+        "interview_id" : job.interview_id,
+        "kind" : job.kind,
+        "status" : job.status,
+        "progress" : job.progress,
+        "total" : job.total,
+        "error" : job.error,
+        "status_url" : url_for("document_job_status", job_id=job.id),
+        "download_url" : url_for("download_document_job", job_id=job.id) if job.status == "done" else None,
+    }
+
+def run_document_job(job_id: str):
+    """Runs one DocumentJob on a JobQueue thread and stores the result in the job row."""
+    started = time.perf_counter()
+    with app.app_context():
+        job = db.session.get(DocumentJob, job_id)
+        job.status = "running"
+        job.heartbeat = datetime.now()
+        db.session.commit()
+        try:
+            interview = db.session.get(Interview, job.interview_id)
+            if job.kind == "rating_sheets":
+                jobs, errors = build_rating_sheet_jobs(interview)
+                job.total = len(jobs)
+                db.session.commit()
+
+                def report(done, total):
+                    job.progress = done
+                    db.session.commit()
+
+                data = b"".join(stream_rating_sheets(jobs, app.config["EXPORT_WORKERS"], errors,
+                                                     on_progress=ProgressThrottle(report, len(jobs))))
+            else:
+                job.total = 1
+                f_type = job.kind[len("car_"):]
+                car_data = build_car_data(interview)
+                etag = fingerprint("CAR", f'{interview.type}_CAR_{f_type}', interview.position_title, car_data)
+                data = DOCUMENTS.get_or_render(etag, METRICS.timed("car", lambda: download_CAR(car_data, interview, f_type=f_type).getvalue()))
+
+            job.result = data
+            job.file_name = f'{interview.id}_{JOB_KINDS[job.kind]}'
+            job.progress = job.total
+            job.status = "done"
+        except Exception as e:
+            log.exception("job %s failed", job_id)
+            db.session.rollback()
+            job = db.session.get(DocumentJob, job_id)
+            job.status = "failed"
+            job.error = str(e)
+        job.finished = datetime.now()
+        db.session.commit()
+        log.info("job %s (%s) %s", job_id, job.kind, job.status,
+                 extra={"duration_ms" : (time.perf_counter() - started) * 1000})
+
+def beat_document_jobs(job_ids: list[str]):
+    """JobQueue heartbeat: marks the queued and running jobs of this process alive."""
+    with app.app_context():
+        DocumentJob.query.filter(
+            DocumentJob.id.in_(job_ids), DocumentJob.status.in_(("queued", "running"))
+        ).update({"heartbeat" : datetime.now()}, synchronize_session=False)
+        db.session.commit()
+
+def job_is_stale(job: "DocumentJob") -> bool:
+    """Queued or running, but the process it belongs to stopped marking it alive (or it predates heartbeats)."""
+    stale = datetime.now() - timedelta(seconds=app.config["JOB_STALE_SECONDS"])
+    return job.status in ("queued", "running") and (job.heartbeat is None or job.heartbeat < stale)
+
+def fail_stale_jobs(job_ids: list[str] = None) -> int:
+    """Fails the queued and running jobs of processes that stopped (of all jobs, or of `job_ids`); the caller commits."""
+    stale = datetime.now() - timedelta(seconds=app.config["JOB_STALE_SECONDS"])
+    query = DocumentJob.query.filter(DocumentJob.status.in_(("queued", "running")),
+                                     db.or_(DocumentJob.heartbeat.is_(None), DocumentJob.heartbeat < stale))
+    if job_ids is not None:
+        query = query.filter(DocumentJob.id.in_(job_ids))
+    return query.update(
+        {"status" : "failed", "error" : "Interrupted: the worker running it stopped", "finished" : datetime.now()},
+        synchronize_session=False
+    )
 
-    if eval_records:
-        for key in eval_struct.keys():
-            total = 0
-            for eval_record in eval_records:
-                temp_json = json.loads(eval_record.extra_data)
-                for val in temp_json[key].values():
-                    total += val
-            eval_score += round(((total / eval_struct[key]['TOTAL']) * eval_struct[key]['WEIGHT']) / len(eval_records), 2)
-        total_score += eval_score
-    
-    return total_score, eval_score
-    
 # ------------------------------------------------------------------------------
 # AUTHENTICATION HELPER
 # ------------------------------------------------------------------------------
@@ -388,10 +1015,20 @@ def admin_dashboard():
     ed_labels = th.parse_table("table", "education")
     ex_labels = th.parse_table("table", "experience")
     tr_labels = th.parse_table("table", "training")
-    interviews = Interview.query.order_by(Interview.date).all()
+
+    q = request.args.get("q", "").strip()
+    status = request.args.get("status")
+    pages = {}
+    for panel in ("open", "close"):
+        if status in (None, "", panel):
+            pages[panel] = interview_page(panel, q, request.args.get(f"{panel}_after"))
+    counts = interview_counts([iv.id for interviews, _ in pages.values() for iv in interviews])
 
     return render_template("admin_dashboard.html",
-                           interviews=interviews,
+                           pages=pages,
+                           counts=counts,
+                           q=q,
+                           status=status,
                            ed_labels=ed_labels,
                            ex_labels=ex_labels,
                            tr_labels=tr_labels)
@@ -413,10 +1050,10 @@ def create_interview():
             "training": int(request.form.get("weight_trn", 10)),}
         )
 
-        app_struct = APPLICANT_STRUCTURE.get(interview_type, {})
-        eval_struct = EVAL_STRUCTURE.get(interview_type, {})
+        app_struct = STRUCTURES.column("app_struct", interview_type)
+        eval_struct = STRUCTURES.column("eval_struct", interview_type)
 
-        if len(eval_struct) == 0 or len(app_struct) == 0:
+        if not eval_struct or not app_struct:
             flash(f"Hmmm, check if your evaluation structure or applicant structure is valid", "Error")
             return redirect(url_for("admin_dashboard"))
         
@@ -431,8 +1068,8 @@ def create_interview():
             position_title=position_data[0],
             sg_level=position_data[1],
             weight_struct = weight_struct,
-            app_struct = json.dumps(app_struct),
-            eval_struct=json.dumps(eval_struct)
+            app_struct = app_struct,
+            eval_struct=eval_struct
         )
         db.session.add(iv)
         db.session.commit()
@@ -468,7 +1105,7 @@ def update_interview(iid):
         flash(f"The interview is already closed you can't do that", "error")
         return redirect(url_for("admin_dashboard"))
     
-    weight_struct = json.loads(interview.weight_struct)
+    weight_struct = STRUCTS.get(interview, "weight_struct")
     if request.method == "POST":
         
         interview.base_edu = int(request.form.get("baseline_education", 1))
@@ -482,8 +1119,11 @@ def update_interview(iid):
         )
 
         interview.weight_struct = weight_struct
+        refresh_scores(interview)
         
         db.session.commit()
+        STRUCTS.invalidate(iid)
+        LEADERBOARDS.invalidate(iid)
 
         flash(f"Interview {iid} updated", "success")
         return redirect(url_for("admin_dashboard"))
@@ -504,6 +1144,8 @@ def delete_interview(iid):
 
     db.session.delete(interview)
     db.session.commit()
+    STRUCTS.invalidate(iid)
+    LEADERBOARDS.invalidate(iid)
     flash(f"Interview {iid} deleted", "success")
     return redirect(url_for("admin_dashboard"))
 
@@ -511,7 +1153,10 @@ def delete_interview(iid):
 @admin_required
 def admin_interview_detail(iid):
     iv = Interview.query.get_or_404(iid)
-    applicants = iv.applicants
+    board = interview_leaderboard(iv)
+    by_code = {applicant.code: applicant for applicant in Applicant.query.filter_by(interview_id=iid)}
+    ranking = [(by_code[code], total) for code, total in board.top() if code in by_code]
+    applicants = [applicant for applicant, _ in ranking]
     eval_tokens = iv.evaluator_tokens
 
     th = TableHandler()
@@ -519,13 +1164,9 @@ def admin_interview_detail(iid):
     ex_labels = th.parse_table("table", "experience")
     tr_labels = th.parse_table("table", "training")
 
-    applicant_structure = json.loads(iv.app_struct)
+    applicant_structure = STRUCTS.get(iv, "app_struct")
 
-    applicants_total_score : list[tuple] = []
-
-    for applicant in applicants:
-        applicants_total_score.append((applicant.code, applicant.name, calculate_applicant_score(applicant_data=applicant, eval_struct=json.loads(iv.eval_struct))[0]))
-    applicants_total_score = sorted(applicants_total_score, key= lambda x : -x[2])
+    applicants_total_score : list[tuple] = [(applicant.code, applicant.name, total) for applicant, total in ranking]
 
     return render_template("admin_interview_detail.html",
                            interview=iv,
@@ -537,6 +1178,26 @@ def admin_interview_detail(iid):
                            ex_labels=ex_labels, 
                            tr_labels=tr_labels)
 
+@app.route("/admin/interview/<iid>/events")
+@admin_required
+def interview_events(iid):
+    """Server-Sent Events with the score changes of an interview (see commit_scores)."""
+    if not app.config["LIVE_RANKING_SSE"]:
+        abort(404)
+    Interview.query.get_or_404(iid)
+    return Response(EVENTS.stream(iid),
+                    mimetype="text/event-stream",
+                    headers={"Cache-Control" : "no-cache", "X-Accel-Buffering" : "no"})
+
+@app.route("/admin/interview/<iid>/revision")
+@admin_required
+def interview_revision(iid):
+    """Current Interview.revision, polled by the interview page when SSE is off."""
+    revision = db.session.query(Interview.revision).filter_by(id=iid).scalar()
+    if revision is None:
+        abort(404)
+    return jsonify({"revision" : revision})
+
 @app.route("/admin/applicant/<code>")
 @admin_required
 def applicant_detail(code):
@@ -548,46 +1209,25 @@ def applicant_detail(code):
         except Exception:
             extra_data = applicant.extra_data
 
-    eval_records = Evaluation.query.filter_by(
-         interview_id=applicant.interview_id,
-         applicant_code=applicant.code
-    ).all()
-
-    eval_type = Interview.query.filter_by(id=applicant.interview_id).first().type
-    eval_struct = json.loads(applicant.interview.eval_struct)
-
-    
-    scores = []
-    avg_eval = None
-    applicant_structure = json.loads(applicant.interview.app_struct)
-    evaluation_scores = {}
-    applicant_score = calculate_baseline_score(applicant, interview=applicant.interview)
-    total_score = applicant_score.get('edu') + applicant_score.get('exp') + applicant_score.get('trn')
-
-    app_json = json.loads(applicant.extra_data)
-    for field in app_json.keys():
-        total_score += app_json[field]
-
-    if eval_records:
-        for key in eval_struct.keys():
-            total = 0
-            for eval_record in eval_records:
-                temp_json = json.loads(eval_record.extra_data)
-                for val in temp_json[key].values():
-                    total += val
-            avg_eval = round(((total / eval_struct[key]['TOTAL']) * eval_struct[key]['WEIGHT']) / len(eval_records), 2)
-            evaluation_scores[key] = avg_eval
-            total_score += avg_eval
-
-    for eval_record in eval_records:
-        overall = 0
-        extra_data_json = json.loads(eval_record.extra_data)
-        for key in eval_struct.keys():
-            for field in eval_struct[key]['CATEGORY'].keys():
-                overall = round(overall + extra_data_json[key][field], 2)
-        scores.append(overall)
-
-
+    eval_struct = STRUCTS.get(applicant.interview, "eval_struct")
+    applicant_structure = STRUCTS.get(applicant.interview, "app_struct")
+
+    score = score_applicants([applicant], applicant.interview,
+                             evaluation_section_totals(applicant.interview_id, [applicant.code]),
+                             eval_struct)[applicant.code]
+    applicant_score = score['baseline']
+    evaluation_scores = score['evaluation']
+    total_score = score['total_score']
+    avg_eval = list(evaluation_scores.values())[-1] if evaluation_scores else None
+
+    # overall of every evaluator's sheet, in submission order
+    overalls = db.session.query(func.sum(EvaluationScore.score)).join(
+        Evaluation, EvaluationScore.evaluation_id == Evaluation.id
+    ).filter(
+        Evaluation.interview_id == applicant.interview_id,
+        Evaluation.applicant_code == applicant.code
+    ).group_by(Evaluation.id).order_by(Evaluation.id)
+    scores = [round(score_sum(overall), 2) for overall, in overalls]
 
     return render_template("applicant_detail.html",
                            applicant=applicant,
@@ -604,94 +1244,103 @@ def applicant_detail(code):
 def download_applicant_data_file(code):
     applicant_data = Applicant.query.get_or_404(code)
     interview_data = Interview.query.get(applicant_data.interview_id)
-    app_struct = json.loads(interview_data.app_struct)
-    eval_struct = json.loads(interview_data.eval_struct)
-    weight_struct = json.loads(interview_data.weight_struct)
-
-    eval_records = Evaluation.query.filter_by(
-        interview_id=applicant_data.interview_id,
-        applicant_code=applicant_data.code
-    ).all()
-
-    total_score, eval_score = calculate_applicant_score(applicant_data, eval_struct)
-    doc_io = download_applicant_data(applicant_data, 
-                                     calculate_baseline_score(applicant_data, interview_data), 
-                                     interview_data, 
-                                     eval_score, 
-                                     total_score, 
-                                     app_struct, 
-                                     eval_struct, 
-                                     weight_struct)
-    # doc_io = download_pdf(code, Applicant(), Evaluation(), Interview(), EVAL_STRUCTURE=EVAL_STRUCTURE, APP_STRUCTURE=APPLICANT_STRUCTURE)
-    # print(doc_io)
+    app_struct = STRUCTS.get(interview_data, "app_struct")
+
+    # the stored scores, so the sheet always matches the ranking
+    score = db.session.get(ApplicantScore, code)
+    if score is None:
+        commit_scores(interview_data, refresh_scores(interview_data, [applicant_data]))
+        score = db.session.get(ApplicantScore, code)
+    context = rating_sheet_context(applicant_data,
+                                   {'edu' : score.score_edu, 'exp' : score.score_exp, 'trn' : score.score_trn},
+                                   interview_data,
+                                   score.eval_score,
+                                   score.total_score,
+                                   app_struct)
+
+    interview_type = str(interview_data.type)
+    etag = fingerprint("RATING-SHEET", f'{interview_type}_RATING-SHEET', context)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    data = DOCUMENTS.get_or_render(etag, METRICS.timed("rating_sheet", lambda: render_rating_sheet(interview_type, context)))
 
     return send_file(
-        doc_io,
+        BytesIO(data),
         as_attachment=True,
         download_name=f'APPLICANT {code}_DETAILS.docx',
-        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        mimetype=DOCX_MIMETYPE,
+        etag=etag
     )
+
 @app.route("/admin/interview/<code>/download/<f_type>")
 @admin_required
 def download_interview_CAR(code, f_type="with_name"):
-    print(f_type)
     interview_data = Interview.query.get_or_404(code)
-    applicant_data_temp = {'code' : [],
-                      'name' : [],
-                      'score' : [],
-                      'eval_score' : [],
-                      'total_score' : [],
-                      }
-    for applicant in interview_data.applicants:
-        applicant_data_temp['code'].append(applicant.code)
-        applicant_data_temp['name'].append(applicant.name)
-        
-        score_data_temp = []
-        app_data_json = json.loads(applicant.extra_data)
-
-        base_line_score = calculate_baseline_score(applicant, interview_data)
-        for key in base_line_score.keys():
-            score_data_temp.append(base_line_score[key])
+    car_data = build_car_data(interview_data)
 
-        for key in app_data_json.keys():
-            score_data_temp.append(app_data_json[key])
+    etag = fingerprint("CAR", f'{interview_data.type}_CAR_{f_type}', interview_data.position_title, car_data)
+    if request.if_none_match.contains(etag):
+        return not_modified(etag)
+    data = DOCUMENTS.get_or_render(etag, METRICS.timed("car", lambda: download_CAR(car_data, interview_data, f_type=f_type).getvalue()))
 
-        applicant_data_temp['score'].append(score_data_temp)
-        total_score, eval_score = calculate_applicant_score(applicant, json.loads(interview_data.eval_struct))
-        applicant_data_temp['eval_score'].append(eval_score)
-        applicant_data_temp['total_score'].append(total_score)
-    
-    combined = list(zip(
-        applicant_data_temp['code'],
-        applicant_data_temp['name'],
-        applicant_data_temp['score'],
-        applicant_data_temp['eval_score'],
-        applicant_data_temp['total_score']
-    ))
+    return send_file(
+        BytesIO(data),
+        as_attachment=True,
+        download_name=f'{interview_data.id}_CAR_{f_type}.docx',
+        mimetype=DOCX_MIMETYPE,
+        etag=etag
+    )
 
-    sorted_packed_data = sorted(combined, key=lambda x : -x[4])
+@app.route("/admin/interview/<iid>/rating_sheets.zip")
+@admin_required
+def download_interview_rating_sheets(iid):
+    interview_data = Interview.query.get_or_404(iid)
+    jobs, errors = build_rating_sheet_jobs(interview_data)
+    return Response(
+        stream_rating_sheets(jobs, app.config["EXPORT_WORKERS"], errors),
+        mimetype='application/zip',
+        headers={'Content-Disposition' : f'attachment; filename="{interview_data.id}_RATING-SHEETS.zip"'}
+    )
 
-    applicant_data = {
-        'code' : [],
-        'name' : [],
-        'score' : [],
-        'eval_score' : [],
-        'total_score' : [],
-    }
+@app.route("/admin/interview/<iid>/jobs", methods=["POST"])
+@admin_required
+def create_document_job(iid):
+    Interview.query.get_or_404(iid)
+    kind = request.form.get("kind", "")
+    if kind not in JOB_KINDS:
+        return {"error" : f"Unknown document kind {kind!r}"}, 400
+
+    retention = datetime.now() - timedelta(hours=app.config["JOB_RETENTION_HOURS"])
+    DocumentJob.query.filter(DocumentJob.finished < retention).delete()
+
+    now = datetime.now()
+    job = DocumentJob(id=uuid.uuid4().hex, interview_id=iid, kind=kind, status="queued", created=now, heartbeat=now)
+    db.session.add(job)
+    db.session.commit()
+    JOBS.submit(job.id, run_document_job)
+    return document_job_payload(job), 202
 
-    for data in sorted_packed_data:
-        applicant_data['code'].append(data[0])
-        applicant_data['name'].append(data[1])
-        applicant_data['score'].append(data[2])
-        applicant_data['eval_score'].append(data[3])
-        applicant_data['total_score'].append(data[4])
+@app.route("/admin/jobs/<job_id>")
+@admin_required
+def document_job_status(job_id):
+    job = DocumentJob.query.get_or_404(job_id)
+    if job_is_stale(job):
+        fail_stale_jobs([job.id])
+        db.session.commit()
+        db.session.refresh(job)
+    return document_job_payload(job)
 
-    doc_io = download_CAR(applicant_data, interview_data, f_type=f_type)
+@app.route("/admin/jobs/<job_id>/download")
+@admin_required
+def download_document_job(job_id):
+    job = DocumentJob.query.get_or_404(job_id)
+    if job.status != "done":
+        return {"error" : f"Job is {job.status}"}, 409
     return send_file(
-        doc_io,
+        BytesIO(job.result),
         as_attachment=True,
-        download_name=f'{interview_data.id}_CAR_{f_type}.docx',
-        mimetype='application/vnd.openxmlformats-officedocument.wordprocessingml.document'
+        download_name=job.file_name,
+        mimetype='application/zip' if job.file_name.endswith('.zip') else DOCX_MIMETYPE
     )
 
 
@@ -704,18 +1353,8 @@ def evaluator_detail(token):
          interview_id=evaluator.interview_id,
          evaluator_token=token
     ).all()
-    iv = Interview.query.filter_by(id=evaluator.interview_id).first()
-    eval_type = iv.type
-    eval_struct = json.loads(iv.eval_struct)
-    scores = []
-
-    for eval_record in eval_records:
-        overall = 0
-        extra_data_json = json.loads(eval_record.extra_data)
-        for key in eval_struct.keys():
-            for field in eval_struct[key]['CATEGORY'].keys():
-                overall = round(overall + extra_data_json[key][field], 2)
-        scores.append(overall)
+    overalls = evaluation_overalls(evaluator.interview_id, token)
+    scores = [overalls.get(eval_record.id, 0) for eval_record in eval_records]
 
     return render_template("evaluator_detail.html",
                            evaluator=evaluator,
@@ -736,7 +1375,7 @@ def add_applicant():
     else:
         code = code.strip().upper()
     
-    weight_struct = json.loads(interview_obj.weight_struct)
+    weight_struct = STRUCTS.get(interview_obj, "weight_struct")
     # Text fields default to empty strings
     name           = request.form.get("name", "").strip()
     address        = request.form.get("address", "").strip()
@@ -776,7 +1415,7 @@ def add_applicant():
     )
 
     # For teaching interviews, the admin now inputs the TRF rating (max 20)
-    applicant_structure = json.loads(interview_obj.app_struct)
+    applicant_structure = STRUCTS.get(interview_obj, "app_struct")
     
     calculated_score = {}
     try:
@@ -789,10 +1428,37 @@ def add_applicant():
     p.extra_data = json.dumps(calculated_score)
 
     db.session.add(p)
-    db.session.commit()
+    commit_scores(interview_obj, refresh_scores(interview_obj, [p]))
     flash(f"Added applicant {code}", "success")
     return redirect(url_for("admin_interview_detail", iid=iid))
 
+# most per-row import errors shown after an upload; the rest are counted
+IMPORT_ERRORS_SHOWN = 20
+
+@app.route("/admin/interview/<iid>/import_applicants", methods=["POST"])
+@admin_required
+def import_applicants_file(iid):
+    interview = Interview.query.get_or_404(iid)
+    upload = request.files.get("file")
+    if not upload or not upload.filename:
+        flash("Choose a .csv or .xlsx file to import.", "error")
+        return redirect(url_for("admin_interview_detail", iid=iid))
+
+    try:
+        imported, errors = import_applicants(interview, read_applicant_rows(upload.stream, upload.filename))
+    except ValueError as e:
+        db.session.rollback()
+        flash(str(e), "error")
+        return redirect(url_for("admin_interview_detail", iid=iid))
+    db.session.commit()
+
+    flash(f"Imported {imported} applicants", "success")
+    for error in errors[:IMPORT_ERRORS_SHOWN]:
+        flash(error, "error")
+    if len(errors) > IMPORT_ERRORS_SHOWN:
+        flash(f"{len(errors) - IMPORT_ERRORS_SHOWN} more rows were skipped", "error")
+    return redirect(url_for("admin_interview_detail", iid=iid))
+
 
 @app.route("/admin/update_applicant/<code>", methods=["GET", "POST"])
 @admin_required
@@ -811,8 +1477,8 @@ def update_applicant(code):
     ex_labels = th.parse_table("table", "experience")
     tr_labels = th.parse_table("table", "training")
 
-    applicant_structure = json.loads(interview.app_struct)
-    weight_struct = json.loads(interview.weight_struct)
+    applicant_structure = STRUCTS.get(interview, "app_struct")
+    weight_struct = STRUCTS.get(interview, "weight_struct")
     if request.method == 'POST':
         # Strings default to empty
         applicant.name           = request.form.get("name", "").strip()
@@ -851,8 +1517,9 @@ def update_applicant(code):
             return redirect(url_for("admin_interview_detail", iid=interview.id))
         # Store the TRF in extra_data as JSON
         applicant.extra_data = json.dumps(calculated_score)
+        scores = refresh_scores(interview, [applicant])
         flash(f"Updated applicant {code}", "success")
-        db.session.commit()
+        commit_scores(interview, scores)
         return redirect(url_for("admin_interview_detail", iid=interview.id))
 
 
@@ -878,21 +1545,40 @@ def delete_applicant(code):
     flash(f"Applicant {applicant.code} data is deleted", "success")
     iid_temp = applicant.interview.id
     db.session.delete(applicant)
-    db.session.commit()
+    commit_scores(applicant.interview, {applicant.code : None})
     return redirect(url_for("admin_interview_detail", iid=iid_temp))
 
 @app.route("/admin/generate_evaluator_tokens", methods=["POST"])
 @admin_required
 def generate_evaluator_tokens():
     iid = request.form["interview_id"]
-    count = int(request.form["count_tokens"])
-    new = []
-    for _ in range(count):
-        tk = str(uuid.uuid4())[:8].upper()
-        et = EvaluatorToken(token=tk, interview_id=iid)
-        db.session.add(et)
-        new.append(tk)
-    db.session.commit()
+    interview = Interview.query.get_or_404(iid)
+    try:
+        count = int(request.form["count_tokens"])
+    except ValueError:
+        count = 0
+    if not 1 <= count <= MAX_TOKENS_PER_BATCH:
+        flash(f"Generate between 1 and {MAX_TOKENS_PER_BATCH} tokens at a time.", "error")
+        return redirect(url_for("admin_interview_detail", iid=iid))
+
+    try:
+        new = create_evaluator_tokens(iid, count)
+        db.session.commit()
+    except IntegrityError:
+        # another admin inserted the same code between the check and the insert
+        db.session.rollback()
+        new = create_evaluator_tokens(iid, count)
+        db.session.commit()
+
+    output = request.form.get("output", "list")
+    if output == "csv":
+        return Response(
+            tokens_csv(interview, new),
+            mimetype="text/csv",
+            headers={"Content-Disposition" : f"attachment; filename={iid}_evaluator_tokens.csv"}
+        )
+    if output == "print":
+        return render_template("evaluator_tokens_print.html", interview=interview, tokens=new)
     flash(f"Generated evaluator tokens: {', '.join(new)}", "success")
     return redirect(url_for("admin_interview_detail", iid=iid))
 
@@ -936,26 +1622,9 @@ def evaluator_dashboard():
     iv = Interview.query.get(iid)
     applicants = iv.applicants
 
-    # print(evaluation.interview.type)
-    eval_type = iv.type
-    eval_struct = json.loads(iv.eval_struct)
-    # For each applicant, get only the evaluation record for the current evaluator.
-    my_scores = {}
-    for a in applicants:
-        eval_rec = Evaluation.query.filter_by(
-            interview_id=iid,
-            evaluator_token=tk,
-            applicant_code=a.code
-        ).first()
-        if eval_rec:
-            extra_data_json = json.loads(eval_rec.extra_data)
-            overall = 0
-            for key in eval_struct.keys():
-                for field in eval_struct[key]['CATEGORY'].keys():
-                    overall = round(overall + extra_data_json[key][field], 2)
-            my_scores[a.code] = round(overall, 2)
-        else:
-            my_scores[a.code] = None
+    # For each applicant, only the overall of the current evaluator's sheet (one query for all of them).
+    overalls = evaluation_overalls(iid, tk, key=Evaluation.applicant_code)
+    my_scores = {a.code: overalls.get(a.code) for a in applicants}
 
     return render_template("evaluator_dashboard.html",
                            applicants=applicants,
@@ -983,7 +1652,7 @@ def evaluator_applicant_detail(code):
 
     iv = Interview.query.filter_by(id=iid).first()
     eval_type = iv.type
-    eval_struct = json.loads(iv.eval_struct)
+    eval_struct = STRUCTS.get(iv, "eval_struct")
     if request.method == "POST":
         try:
             extra_data = {}
@@ -999,7 +1668,6 @@ def evaluator_applicant_detail(code):
         for key in eval_struct.keys():
             for field in eval_struct[key]['CATEGORY'].keys():
                 if extra_data[key][field] <= 0 or extra_data[key][field] > eval_struct[key]['CATEGORY'][field]:
-                    print("GAGO KA BA HANS")
                     flash("Each criteria must be between 0 and 1.", "error")
                     return redirect(url_for("evaluator_applicant_detail", code=code))
         extra_data_str = json.dumps(extra_data)            
@@ -1016,7 +1684,20 @@ def evaluator_applicant_detail(code):
             db.session.add(evaluation)
             flash("Your evaluation has been submitted.", "success")
 
-        db.session.commit()
+        try:
+            write_evaluation_scores(evaluation, extra_data)
+            commit_scores(iv, refresh_scores(iv, [applicant]))
+        except IntegrityError:
+            # a parallel submission of the same evaluation won the insert; update that row instead
+            db.session.rollback()
+            evaluation = Evaluation.query.filter_by(
+                interview_id=iid,
+                evaluator_token=tk,
+                applicant_code=code
+            ).one()
+            evaluation.extra_data = extra_data_str
+            write_evaluation_scores(evaluation, extra_data)
+            commit_scores(iv, refresh_scores(iv, [applicant]))
         return redirect(url_for("evaluator_dashboard"))
     
     if evaluation and evaluation.extra_data:
@@ -1048,10 +1729,361 @@ def logout():
     session.clear()
     return redirect(url_for("evaluator_login"))
 
+# ------------------------------------------------------------------------------
+# API ROUTES (read-only, v1)
+# ------------------------------------------------------------------------------
+
+def api_keys() -> list[str]:
+    """
+    API_KEYS as a list of non-empty keys. FLASK_API_KEYS is kept as a plain
+    string unless it is a JSON list, so a string is split on commas rather
+    than iterated character by character.
+    """
+    keys = app.config["API_KEYS"] or []
+    if isinstance(keys, str):
+        keys = keys.split(",")
+    return [str(k).strip() for k in keys if str(k).strip()]
+
+def api_required(f):
+    """Admin session or one of the configured API_KEYS in the X-API-Key header (or as a Bearer token)."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        key = request.headers.get("X-API-Key", "") or request.headers.get("Authorization", "").removeprefix("Bearer ")
+        if not session.get("admin") and not (key and any(hmac.compare_digest(key.encode(), k.encode()) for k in api_keys())):
+            return jsonify({"error" : "unauthorized"}), 401
+        return f(*args, **kwargs)
+    return wrapper
+
+def api_error(message: str, status: int):
+    return jsonify({"error" : message}), status
+
+def select_fields(item: dict, fields: list[str]) -> dict:
+    return {key: item[key] for key in fields if key in item} if fields else item
+
+def api_response(version, last_modified: datetime, build) -> Response:
+    """
+    Conditional JSON response. The ETag is derived from the request and a
+    cheap `version` (e.g. Interview.updated_at), so a client that already
+    has the current data gets a 304 before `build()` runs any query.
+    `?fields=a,b` keeps only those keys of every returned item.
+    """
+    etag = hashlib.sha256(json.dumps(
+        [request.path, sorted(request.args.items(multi=True)), version], default=str
+    ).encode("utf-8")).hexdigest()[:32]
+    if last_modified is not None:
+        last_modified = last_modified.astimezone(timezone.utc).replace(microsecond=0)
+    if request.if_none_match.contains(etag) or (
+        not request.if_none_match and last_modified is not None
+        and request.if_modified_since is not None and last_modified <= request.if_modified_since
+    ):
+        response = not_modified(etag)
+    else:
+        response = jsonify(build([field for field in request.args.get("fields", "").split(",") if field]))
+        response.set_etag(etag)
+    if last_modified is not None:
+        response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response
+
+def interview_version(interview: Interview) -> tuple[str, datetime]:
+    """Version and Last-Modified of everything served about one interview."""
+    return interview.updated_at.isoformat(), interview.updated_at
+
+@app.route("/api/v1/interviews")
+@api_required
+def api_interviews():
+    status = request.args.get("status", "open")
+    if status not in ("open", "close"):
+        return api_error("status must be open or close", 400)
+    modified, total = db.session.query(func.max(Interview.updated_at), func.count(Interview.id)).one()
+
+    def build(fields):
+        interviews, next_cursor = interview_page(status, request.args.get("q", "").strip(), request.args.get("after"))
+        counts = interview_counts([iv.id for iv in interviews])
+        return {
+            "interviews" : [select_fields({
+                "id" : iv.id,
+                "type" : iv.type,
+                "position_title" : iv.position_title,
+                "sg_level" : iv.sg_level,
+                "date" : iv.date.isoformat(),
+                "status" : iv.status,
+                "updated_at" : iv.updated_at.isoformat() if iv.updated_at else None,
+                "applicants" : counts[iv.id]['applicants'],
+                "evaluator_tokens" : counts[iv.id]['tokens'],
+            }, fields) for iv in interviews],
+            "next" : next_cursor,
+        }
+    return api_response([modified, total], modified, build)
+
+@app.route("/api/v1/interviews/<iid>/ranking")
+@api_required
+def api_interview_ranking(iid):
+    iv = db.session.get(Interview, iid)
+    if iv is None:
+        return api_error("interview not found", 404)
+    version, modified = interview_version(iv)
+
+    def build(fields):
+        return {
+            "interview_id" : iv.id,
+            "ranking" : [select_fields({
+                "rank" : rank,
+                "code" : applicant.code,
+                "name" : applicant.name,
+                "score_edu" : score.score_edu,
+                "score_exp" : score.score_exp,
+                "score_trn" : score.score_trn,
+                "extra_total" : score.extra_total,
+                "eval_score" : score.eval_score,
+                "total_score" : score.total_score,
+            }, fields) for rank, (applicant, score) in enumerate(get_interview_ranking(iv), start=1)],
+        }
+    return api_response(version, modified, build)
+
+@app.route("/api/v1/applicants/<code>")
+@api_required
+def api_applicant_scores(code):
+    applicant = db.session.get(Applicant, code)
+    if applicant is None:
+        return api_error("applicant not found", 404)
+    iv = applicant.interview
+    version, modified = interview_version(iv)
+
+    def build(fields):
+        section_totals = evaluation_section_totals(iv.id, [code])
+        score = score_applicants([applicant], iv, section_totals)[code]
+        return select_fields({
+            "code" : applicant.code,
+            "name" : applicant.name,
+            "interview_id" : iv.id,
+            "baseline" : score['baseline'],
+            "extra" : score['extra'],
+            "extra_total" : score['extra_total'],
+            "evaluations" : section_totals.get(code, (0, {}))[0],
+            "evaluation" : score['evaluation'],
+            "eval_score" : score['eval_score'],
+            "total_score" : score['total_score'],
+            "rank" : interview_leaderboard(iv).rank(code),
+        }, fields)
+    return api_response(version, modified, build)
+
+@app.route("/api/v1/interviews/<iid>/evaluators")
+@api_required
+def api_evaluator_progress(iid):
+    iv = db.session.get(Interview, iid)
+    if iv is None:
+        return api_error("interview not found", 404)
+    version, modified = interview_version(iv)
+
+    def build(fields):
+        applicants = db.session.query(func.count(Applicant.code)).filter_by(interview_id=iid).scalar()
+        evaluated = dict(db.session.query(Evaluation.evaluator_token, func.count(Evaluation.id)).filter_by(
+            interview_id=iid
+        ).group_by(Evaluation.evaluator_token).all())
+        tokens = EvaluatorToken.query.filter_by(interview_id=iid).order_by(EvaluatorToken.token).all()
+        return {
+            "interview_id" : iid,
+            "applicants" : applicants,
+            "evaluators" : [select_fields({
+                "token" : et.token,
+                "registered" : et.registered,
+                "evaluated" : evaluated.get(et.token, 0),
+                "complete" : applicants > 0 and evaluated.get(et.token, 0) >= applicants,
+            }, fields) for et in tokens],
+        }
+    return api_response(version, modified, build)
+
+@app.route("/admin/metrics")
+@api_required
+def metrics():
+    """Prometheus scrape target; counters are per worker process."""
+    if not METRICS.enabled:
+        return api_error("metrics are disabled (set METRICS_ENABLED)", 404)
+    return Response(METRICS.render(), mimetype="text/plain; version=0.0.4")
+
+# ------------------------------------------------------------------------------
+# CLI COMMANDS
+# ------------------------------------------------------------------------------
+
+@app.cli.command("import-applicants")
+@click.argument("iid")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+def import_applicants_command(iid, path):
+    """Import the applicants of a .csv or .xlsx file into interview IID."""
+    create_app()
+    interview = db.session.get(Interview, iid)
+    if interview is None:
+        raise click.ClickException(f"Interview {iid} not found")
+    with open(path, "rb") as fp:
+        try:
+            imported, errors = import_applicants(interview, read_applicant_rows(fp, path))
+        except ValueError as e:
+            db.session.rollback()
+            raise click.ClickException(str(e))
+    db.session.commit()
+    for error in errors:
+        click.echo(error, err=True)
+    click.echo(f"Imported {imported} applicants, skipped {len(errors)} rows")
+
+@app.cli.command("warm-up")
+def warm_up_command():
+    """Fill the template bytecode cache and check that structures and templates load (e.g. before starting workers)."""
+    create_app()
+    if not app.config["WARM_UP"]:
+        warm_up()
+    click.echo(f"Warmed up {len(app.jinja_env.list_templates())} page templates")
+
+# ------------------------------------------------------------------------------
+# Database setup
+# ------------------------------------------------------------------------------
+
+def dedupe_evaluations():
+    """Keeps only the latest of duplicate submissions, so the unique evaluation index can be created."""
+    keep = db.select(func.max(Evaluation.id)).group_by(
+        Evaluation.interview_id, Evaluation.evaluator_token, Evaluation.applicant_code
+    )
+    stale = db.session.execute(
+        db.select(Evaluation.applicant_code).where(Evaluation.id.not_in(keep)).distinct()
+    ).scalars().all()
+    if stale:
+        db.session.execute(db.delete(Evaluation).where(Evaluation.id.not_in(keep)))
+        db.session.execute(db.delete(ApplicantScore).where(ApplicantScore.applicant_code.in_(stale)))
+        db.session.commit()
+
+def upgrade_db():
+    """
+    Brings databases created by older versions up to the current schema.
+
+    The interviews.updated_at and revision columns, document_jobs.heartbeat
+    and missing indexes are added in place.
+    Before the unique evaluation index is created, duplicate submissions are
+    collapsed to the most recent one (the row with the highest id) and the
+    cached scores of the affected applicants are dropped so they get recomputed. Evaluations without normalized
+    EvaluationScore rows are backfilled from their JSON blob.
+    """
+    columns = {column["name"] for column in inspect(db.engine).get_columns(Interview.__tablename__)}
+    if "updated_at" not in columns:
+        db.session.execute(db.text("ALTER TABLE interviews ADD COLUMN updated_at DATETIME"))
+        db.session.execute(db.text("UPDATE interviews SET updated_at = date || ' 00:00:00.000000'"))
+        db.session.commit()
+    if "revision" not in columns:
+        db.session.execute(db.text("ALTER TABLE interviews ADD COLUMN revision INTEGER NOT NULL DEFAULT 0"))
+        db.session.commit()
+    if "heartbeat" not in {column["name"] for column in inspect(db.engine).get_columns(DocumentJob.__tablename__)}:
+        db.session.execute(db.text("ALTER TABLE document_jobs ADD COLUMN heartbeat DATETIME"))
+        db.session.commit()
+
+    for model in (Interview, EvaluatorToken, Applicant, Evaluation):
+        existing = {index["name"] for index in inspect(db.engine).get_indexes(model.__tablename__)}
+        for index in model.__table__.indexes:
+            if index.name not in existing:
+                if model is Evaluation and index.unique:
+                    dedupe_evaluations()
+                index.create(db.engine)
+
+    # evaluations stored before evaluation_scores existed only have their JSON blob
+    missing = db.session.query(Evaluation.id, Evaluation.extra_data).filter(
+        ~Evaluation.scores.any(), Evaluation.extra_data.isnot(None)
+    ).all()
+    rows = [row for evaluation_id, extra_data in missing for row in build_score_rows(evaluation_id, json.loads(extra_data))]
+    if rows:
+        db.session.execute(insert(EvaluationScore), rows)
+        db.session.commit()
+
+def init_db():
+    """Creates tables missing from the database (e.g. applicant_scores on older files)."""
+    db.create_all()
+    upgrade_db()
+    # jobs of a process that stopped will never finish; jobs of other live workers keep their heartbeat
+    fail_stale_jobs()
+    db.session.commit()
+
+def warm_up():
+    """
+    Loads what the first requests of a worker would otherwise load: page
+    templates (from the bytecode cache when it is filled), lookup tables,
+    default structures and the .docx templates.
+    """
+    for name in app.jinja_env.list_templates():
+        app.jinja_env.get_template(name)
+    for t_type in PATHS:
+        for s_type in ("education", "experience", "training"):
+            TABLES.get(t_type, s_type)
+    for field in STRUCT_FIELDS:
+        STRUCTURES.get(field)
+    for folder in sorted(os.listdir(DOC_PATH)):
+        for file_name in sorted(os.listdir(os.path.join(DOC_PATH, folder))):
+            if file_name.endswith(".docx"):
+                TEMPLATES.get(folder, file_name[:-len(".docx")])
+
+# ------------------------------------------------------------------------------
+# Application setup
+# ------------------------------------------------------------------------------
+
+_setup_lock = threading.Lock()
+
+def create_app() -> Flask:
+    """
+    Finishes setting up the app and returns it: starts logging, creates and
+    upgrades the database, sizes the background workers, enables the
+    template bytecode cache and warms up. This is not a factory of new
+    instances: the work is done once per process, and every call returns
+    the same module-level `app`.
+
+    Serve the app through it so this happens at startup:
+
+        flask --app "app:create_app()" run
+        gunicorn "app:create_app()"
+
+    Served as `app:app` instead, the app still works (configuration and
+    request hooks are in place on import), but this setup then runs inside
+    the first request while other requests wait for it.
+    """
+    with _setup_lock:
+        if "hrmpsb" in app.extensions:
+            return app
+        listener = configure_logging(app.config["LOG_LEVEL"], app.config["LOG_FORMAT"],
+                                     app.config["LOG_FILE"], app.config["LOG_QUEUE_SIZE"])
+        atexit.register(listener.stop)
+        with app.app_context():
+            init_db()
+        JOBS.resize(app.config["JOB_WORKERS"])
+        JOBS.heartbeat(beat_document_jobs, app.config["JOB_HEARTBEAT_SECONDS"])
+        DOCUMENTS.configure(app.config["DOC_CACHE_MAX_BYTES"], app.config["DOC_CACHE_DIR"], app.config["DOC_CACHE_DISK_MAX_BYTES"])
+
+        cache_dir = app.config["TEMPLATE_CACHE_DIR"]
+        if cache_dir is None:
+            cache_dir = os.path.join(app.instance_path, "jinja_cache")
+        if cache_dir:
+            # written through a temporary file and a rename, so workers can share it
+            os.makedirs(cache_dir, exist_ok=True)
+            app.jinja_env.bytecode_cache = FileSystemBytecodeCache(cache_dir)
+        if app.config["WARM_UP"]:
+            warm_up()
+
+        app.extensions["hrmpsb"] = {"log_listener" : listener}
+    return app
+
+@app.before_request
+def ensure_setup():
+    if "hrmpsb" not in app.extensions:
+        create_app()
+
+# hooks and engine listeners only: nothing is connected, read or written here
+install_request_logging(app, app.config["LOG_REQUESTS"])
+with app.app_context():
+    apply_sqlite_profile(db.engine, sqlite_pragmas(app.config["SQLITE_PROFILE"],
+                                                   app.config["SQLITE_BUSY_TIMEOUT"],
+                                                   app.config["SQLITE_PRAGMAS"]))
+    if app.config["METRICS_ENABLED"]:
+        METRICS.install(app, db.engine)
+    if app.config["QUERY_GUARD"]:
+        QUERY_GUARD.install(app, db.engine, app.config["QUERY_GUARD_REPEATS"],
+                            app.config["QUERY_BUDGET"], app.config["QUERY_BUDGET_STRICT"])
+
 # ------------------------------------------------------------------------------
 # Run the Application
 # ------------------------------------------------------------------------------
 if __name__ == "__main__":
-    with app.app_context():
-        db.create_all()
-    app.run(debug=True)
+    create_app().run(debug=True)
@@ -0,0 +1,200 @@
+"""
+Benchmarks of the scoring, dashboard and document hot paths on synthetic data.
+
+    python -m benchmarks.bench                          # 100 / 1000 / 10000 applicants
+    python -m benchmarks.bench --sizes 100 1000 --out before.json
+    python -m benchmarks.bench --out after.json --compare before.json
+
+Everything runs against a throwaway SQLite database in a temporary
+directory. Results are written as JSON (one record per benchmark and
+size, timings in seconds); --compare prints the median ratio against an
+earlier run and exits with 1 when one of them got slower than --fail-above.
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(fn, repeat: int, budget: float) -> list[float]:
+    """Runs `fn` once to warm up, then up to `repeat` timed runs within `budget` seconds."""
+    fn()
+    times = []
+    started = time.perf_counter()
+    while len(times) < repeat:
+        t = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t)
+        if time.perf_counter() - started > budget:
+            break
+    return times
+
+
+def summary(name: str, size: int, times: list[float]) -> dict:
+    return {
+        "name"   : name,
+        "size"   : size,
+        "runs"   : len(times),
+        "min"    : min(times),
+        "median" : statistics.median(times),
+        "mean"   : statistics.fmean(times),
+        "max"    : max(times),
+    }
+
+
+def git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(args) -> list[dict]:
+    # app.py reads the database URI from the environment when it is imported
+    workdir = tempfile.mkdtemp(prefix="hrmpsb-bench-")
+    os.environ["FLASK_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+    sys.path.insert(0, ROOT)
+    import app as A
+    A.create_app()
+    from scripts.document_cache import DOCUMENTS
+    from scripts.leaderboard import LEADERBOARDS
+    from benchmarks.synthetic import SyntheticData
+
+    results = []
+    data = SyntheticData(args.seed)
+    with A.app.app_context():
+        t = time.perf_counter()
+        data.history(args.history, args.history_applicants, args.evaluators)
+        print(f"history: {args.history} interviews in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+
+        for size in args.sizes:
+            t = time.perf_counter()
+            iv = data.populate(args.type, size, args.evaluators)
+            print(f"{size} applicants: generated in {time.perf_counter() - t:.1f}s", file=sys.stderr)
+            iid = iv.id
+            applicants = A.Applicant.query.filter_by(interview_id=iid).all()
+            one = applicants[len(applicants) // 2]
+            eval_struct = A.STRUCTS.get(iv, "eval_struct")
+            token = A.EvaluatorToken.query.filter_by(interview_id=iid).first().token
+
+            admin = A.app.test_client()
+            with admin.session_transaction() as s:
+                s["admin"] = True
+            evaluator = A.app.test_client()
+            with evaluator.session_transaction() as s:
+                s["evaluator_token"] = token
+                s["interview_id"] = iid
+
+            def get(client, url):
+                def fetch():
+                    response = client.get(url)
+                    assert response.status_code == 200, (url, response.status_code)
+                    response.close()
+                return fetch
+
+            def cold(fn, *caches):
+                def call():
+                    for cache in caches:
+                        cache()
+                    fn()
+                return call
+
+            benches = {
+                "calculate_baseline_score"       : lambda: A.calculate_baseline_score(one, iv),
+                "calculate_baseline_scores"      : lambda: A.calculate_baseline_scores(applicants, iv),
+                "calculate_applicant_score"      : lambda: A.calculate_applicant_score(one, eval_struct),
+                "refresh_scores"                 : lambda: (A.refresh_scores(iv), A.db.session.rollback()),
+                "admin_dashboard"                : get(admin, "/admin/dashboard"),
+                "admin_interview_detail"         : get(admin, f"/admin/interview/{iid}"),
+                "admin_interview_detail_cold"    : cold(get(admin, f"/admin/interview/{iid}"), LEADERBOARDS.invalidate),
+                "evaluator_dashboard"            : get(evaluator, "/evaluator"),
+                "api_interview_ranking"          : get(admin, f"/api/v1/interviews/{iid}/ranking"),
+                "download_interview_CAR"         : get(admin, f"/admin/interview/{iid}/download/with_name"),
+                "download_interview_CAR_render"  : cold(get(admin, f"/admin/interview/{iid}/download/with_name"), DOCUMENTS.clear),
+            }
+            for name, fn in benches.items():
+                if args.only and name not in args.only:
+                    continue
+                if name.endswith("_render") and size > args.max_render_size:
+                    print(f"{name:32} {size:>6}  skipped (--max-render-size)", file=sys.stderr)
+                    continue
+                record = summary(name, size, measure(fn, args.repeat, args.budget))
+                results.append(record)
+                print(f"{name:32} {size:>6}  median {record['median'] * 1000:10.2f} ms  ({record['runs']} runs)", file=sys.stderr)
+        A.db.engine.dispose()
+    if args.keep_db:
+        print(f"database kept in {workdir}", file=sys.stderr)
+    else:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return results
+
+
+def compare(results: list[dict], baseline_path: str, fail_above: float) -> bool:
+    with open(baseline_path) as fp:
+        baseline = {(r["name"], r["size"]): r for r in json.load(fp)["results"]}
+    ok = True
+    print(f"{'benchmark':32} {'size':>6} {'before ms':>11} {'after ms':>11} {'ratio':>7}")
+    for record in results:
+        before = baseline.get((record["name"], record["size"]))
+        if before is None:
+            continue
+        ratio = record["median"] / before["median"] if before["median"] else float("inf")
+        flag = " <- slower" if ratio > fail_above else ""
+        ok = ok and not flag
+        print(f"{record['name']:32} {record['size']:>6} {before['median'] * 1000:11.2f} "
+              f"{record['median'] * 1000:11.2f} {ratio:7.2f}{flag}")
+    return ok
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000], help="applicants per benchmarked interview")
+    parser.add_argument("--evaluators", type=int, default=5, help="evaluators per interview, each evaluating every applicant")
+    parser.add_argument("--type", default="teacher 1", help="interview type of the benchmarked interviews")
+    parser.add_argument("--history", type=int, default=50, help="closed interviews (all five types) filling the dashboard")
+    parser.add_argument("--history-applicants", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=2024)
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--budget", type=float, default=10.0, help="stop repeating a benchmark after this many seconds")
+    parser.add_argument("--only", nargs="+", help="run only these benchmarks")
+    parser.add_argument("--max-render-size", type=int, default=1000,
+                        help="largest size at which uncached documents are rendered (a render takes tens of seconds at 1000)")
+    parser.add_argument("--keep-db", action="store_true", help="keep the generated database for inspection")
+    parser.add_argument("--out", help="write results to this JSON file (default: stdout)")
+    parser.add_argument("--compare", help="earlier results file to compare medians against")
+    parser.add_argument("--fail-above", type=float, default=1.25, help="median ratio counted as a regression")
+    args = parser.parse_args(argv)
+
+    results = run(args)
+    report = {
+        "meta" : {
+            "created"  : datetime.now().isoformat(timespec="seconds"),
+            "revision" : git_revision(),
+            "python"   : platform.python_version(),
+            "platform" : platform.platform(),
+            "args"     : {k: v for k, v in vars(args).items() if k not in ("out", "compare")},
+        },
+        "results" : results,
+    }
+    if args.out:
+        with open(args.out, "w") as fp:
+            json.dump(report, fp, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+        print()
+    if args.compare and not compare(results, args.compare, args.fail_above):
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Seeded synthetic data for the benchmarks.
+
+Runs against whatever database create_app() opened; bench.py points
+FLASK_SQLALCHEMY_DATABASE_URI at a throwaway one first.
+Applicants go through import_applicants() and tokens through
+create_evaluator_tokens(), so the rows look exactly like production rows.
+"""
+import json
+import random
+from datetime import date, timedelta
+
+from sqlalchemy import func, insert
+
+from app import (db, Interview, Evaluation, EvaluationScore, EvaluatorToken,
+                 STRUCTURES,
+                 import_applicants, create_evaluator_tokens, refresh_scores)
+from scripts.table_handler import TableHandler
+
+INTERVIEW_TYPES = ("teacher 1", "related teaching", "higher teaching", "non teaching", "school administration")
+
+
+class SyntheticData:
+    def __init__(self, seed: int = 2024):
+        self.rnd = random.Random(seed)
+        th = TableHandler()
+        self.levels = {field: [int(k) for k in th.parse_table("table", field)]
+                       for field in ("education", "experience", "training")}
+
+    def interview(self, interview_type: str, day: date, status: str = "open") -> Interview:
+        iv = Interview(
+            id=f"{self.rnd.getrandbits(32):08X}",
+            date=day,
+            base_edu=self.rnd.choice(self.levels["education"]),
+            base_exp=self.rnd.choice(self.levels["experience"]),
+            base_trn=self.rnd.choice(self.levels["training"]),
+            type=interview_type,
+            status=status,
+            position_title=f"{interview_type.title()} {self.rnd.randint(1, 999)}",
+            sg_level=str(self.rnd.randint(1, 24)),
+            weight_struct=STRUCTURES.column("weight_struct", interview_type),
+            app_struct=STRUCTURES.column("app_struct", interview_type),
+            eval_struct=STRUCTURES.column("eval_struct", interview_type),
+        )
+        db.session.add(iv)
+        db.session.commit()
+        return iv
+
+    @staticmethod
+    def code(interview: Interview, line: int) -> str:
+        return f"{interview.id}{line:05d}"
+
+    def applicant_rows(self, interview: Interview, count: int):
+        app_struct = STRUCTURES.get("app_struct")[interview.type]
+        for line in range(count):
+            row = {
+                "applicant_code" : self.code(interview, line),
+                "name"           : f"Applicant {interview.id} {line}",
+                "address"        : "Synthetic St.",
+                "contact_number" : f"09{self.rnd.randint(0, 999999999):09d}",
+                "email_address"  : f"a{line}@example.com",
+                "birthday"       : (date(1970, 1, 1) + timedelta(days=self.rnd.randint(0, 12000))).isoformat(),
+                "age"            : self.rnd.randint(21, 60),
+                "sex"            : self.rnd.choice(("Male", "Female")),
+                "education"      : self.rnd.choice(self.levels["education"]),
+                "experience"     : self.rnd.choice(self.levels["experience"]),
+                "training"       : self.rnd.choice(self.levels["training"]),
+            }
+            for field, spec in app_struct.items():
+                row[field] = round(self.rnd.uniform(0, spec["MAX_SCORE"]), 2)
+            yield line + 2, row
+
+    def evaluations(self, interview: Interview, tokens: list[str], codes: list[str]):
+        """Every token evaluates every applicant, written with bulk inserts."""
+        eval_struct = STRUCTURES.get("eval_struct")[interview.type]
+        next_id = (db.session.query(func.max(Evaluation.id)).scalar() or 0) + 1
+        evaluations, scores = [], []
+        for token in tokens:
+            for code in codes:
+                extra = {section: {criterion: round(self.rnd.uniform(0.1, limit), 2)
+                                   for criterion, limit in spec["CATEGORY"].items()}
+                         for section, spec in eval_struct.items()}
+                evaluations.append({"id" : next_id, "interview_id" : interview.id, "evaluator_token" : token,
+                                    "applicant_code" : code, "extra_data" : json.dumps(extra)})
+                scores.extend({"evaluation_id" : next_id, "section" : section, "criterion" : criterion, "score" : score}
+                              for section, criteria in extra.items() for criterion, score in criteria.items())
+                next_id += 1
+        if evaluations:
+            db.session.execute(insert(Evaluation), evaluations)
+            db.session.execute(insert(EvaluationScore), scores)
+
+    def populate(self, interview_type: str, applicants: int, evaluators: int,
+                 day: date = None, status: str = "open") -> Interview:
+        """One fully scored interview: applicants, registered evaluators and their evaluations."""
+        iv = self.interview(interview_type, day or date.today(), status)
+        imported, errors = import_applicants(iv, self.applicant_rows(iv, applicants))
+        if errors:
+            raise RuntimeError(f"synthetic rows rejected: {errors[:3]}")
+        tokens = create_evaluator_tokens(iv.id, evaluators)
+        db.session.query(EvaluatorToken).filter(EvaluatorToken.interview_id == iv.id).update({"registered" : True})
+        codes = [self.code(iv, line) for line in range(imported)]
+        self.evaluations(iv, tokens, codes)
+        refresh_scores(iv)
+        db.session.commit()
+        return iv
+
+    def history(self, interviews: int, applicants: int, evaluators: int, years: int = 5) -> list[Interview]:
+        """Closed interviews of every type spread over the past `years` years."""
+        start = date.today() - timedelta(days=365 * years)
+        return [self.populate(INTERVIEW_TYPES[n % len(INTERVIEW_TYPES)], applicants, evaluators,
+                              start + timedelta(days=self.rnd.randint(0, 365 * years)), "close")
+                for n in range(interviews)]
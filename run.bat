@@ -1,2 +1,2 @@
-python -m flask run --host=0.0.0.0
+python -m flask --app "app:create_app()" run --host=0.0.0.0
 
@@ -0,0 +1,131 @@
+import csv
+import io
+import json
+import uuid
+from datetime import date, datetime
+from itertools import islice
+
+IMPORT_CHUNK_SIZE = 500
+
+# file column -> Applicant column, same names as the add applicant form
+TEXT_COLUMNS = {
+    "name"           : "name",
+    "address"        : "address",
+    "contact_number" : "contact_number",
+    "email_address"  : "email_addr",
+}
+RAW_COLUMNS = {
+    "education"  : "raw_edu",
+    "experience" : "raw_exp",
+    "training"   : "raw_trn",
+}
+
+
+def read_applicant_rows(stream, filename: str):
+    """
+    Yields (line number, {column: value}) for every non-empty row of a CSV
+    or XLSX upload, reading the file as it goes. Column names are taken from
+    the first row and lower-cased.
+    """
+    workbook = None
+    extension = filename.rsplit(".", 1)[-1].lower()
+    if extension == "csv":
+        rows = csv.reader(io.TextIOWrapper(stream, encoding="utf-8-sig", newline=""))
+    elif extension == "xlsx":
+        try:
+            from openpyxl import load_workbook
+        except ImportError:
+            raise ValueError("Importing .xlsx files needs openpyxl (pip install openpyxl); upload a .csv instead.")
+        workbook = load_workbook(stream, read_only=True, data_only=True)
+        rows = workbook.worksheets[0].iter_rows(values_only=True)
+    else:
+        raise ValueError(f"Unsupported file type '.{extension}', upload a .csv or .xlsx file.")
+
+    try:
+        header = next(rows, None)
+        if header is None:
+            raise ValueError("The file is empty.")
+        header = [str(column or "").strip().lower() for column in header]
+        if "name" not in header:
+            raise ValueError("The file has no 'name' column.")
+
+        for line, values in enumerate(rows, start=2):
+            if all(value is None or str(value).strip() == "" for value in values):
+                continue
+            yield line, dict(zip(header, values))
+    finally:
+        # a read-only workbook keeps the file open until it is closed
+        if workbook is not None:
+            workbook.close()
+
+
+def chunked(iterable, size: int):
+    iterator = iter(iterable)
+    while chunk := list(islice(iterator, size)):
+        yield chunk
+
+
+def _text(row: dict, column: str, default: str = "") -> str:
+    value = row.get(column)
+    return default if value is None else str(value).strip()
+
+def _int(row: dict, column: str) -> int:
+    value = row.get(column)
+    if value is None or str(value).strip() == "":
+        return 0
+    try:
+        number = float(value)
+    except ValueError:
+        raise ValueError(f"{column} must be a whole number, got '{value}'")
+    if not number.is_integer():
+        raise ValueError(f"{column} must be a whole number, got '{value}'")
+    return int(number)
+
+def _date(row: dict, column: str) -> date:
+    value = row.get(column)
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    try:
+        return datetime.strptime(_text(row, column), "%Y-%m-%d").date()
+    except ValueError:
+        raise ValueError(f"{column} must be a date (YYYY-MM-DD), got '{value or ''}'")
+
+
+def parse_applicant_row(row: dict, app_struct, labels: dict) -> dict:
+    """
+    Validates one imported row the way add_applicant reads its form and
+    returns the Applicant column values, with the applicant structure
+    scores already weighted into extra_data. Raises ValueError with a
+    readable message for the first problem found.
+
+    `labels` maps education/experience/training to their label tables;
+    raw values must be one of the listed levels.
+    """
+    values = {column: _text(row, field) for field, column in TEXT_COLUMNS.items()}
+    if not values["name"]:
+        raise ValueError("name is required")
+    code = _text(row, "applicant_code").upper()
+    values["code"] = code or str(uuid.uuid4())[:8].upper()
+    values["sex"] = _text(row, "sex") or "Female"
+    values["birthday"] = _date(row, "birthday")
+    values["age"] = _int(row, "age")
+
+    for field, column in RAW_COLUMNS.items():
+        raw = _int(row, field)
+        if str(raw) not in labels[field]:
+            raise ValueError(f"{field} level {raw} is not in the {field} table")
+        values[column] = raw
+
+    calculated_score = {}
+    for field in app_struct.keys():
+        try:
+            score = float(_text(row, field) or 0)
+        except ValueError:
+            raise ValueError(f"{field} must be numeric, got '{row.get(field)}'")
+        if score < 0 or score > app_struct[field]['MAX_SCORE']:
+            raise ValueError(f"{field} must be between 0 and {app_struct[field]['MAX_SCORE']}")
+        calculated_score[field] = round((score / app_struct[field]['MAX_SCORE']) * app_struct[field]['WEIGHT'], 2)
+    values["extra_data"] = json.dumps(calculated_score)
+    return values
@@ -0,0 +1,119 @@
+import os
+import threading
+import multiprocessing
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
+from scripts.debugger import get_log_info
+from scripts.download_handler import render_rating_sheet
+
+_pool = None
+_pool_workers = None
+_pool_lock = threading.Lock()
+
+
+def default_workers() -> int:
+    return max(1, min(4, (os.cpu_count() or 2) - 1))
+
+
+def get_pool(workers: int = None) -> ProcessPoolExecutor:
+    """
+    Shared process pool for docx rendering (CPU-bound, so threads would
+    serialize on the GIL). Re-created when the configured size changes, and
+    when a render process died (out of memory, crash) and broke the pool.
+    """
+    global _pool, _pool_workers
+    workers = workers or default_workers()
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers or getattr(_pool, "_broken", False):
+            if _pool is not None:
+                _pool.shutdown(wait=False)
+            # spawn, not fork: the web server is multithreaded, and a forked child
+            # would inherit locks held by other threads (logging queue, DB pool)
+            _pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pool_workers = workers
+        return _pool
+
+
+def submit_render(workers: int, interview_type: str, context: dict):
+    """Submits one render, on a new pool if the shared one broke in the meantime."""
+    try:
+        return get_pool(workers).submit(render_rating_sheet, interview_type, context)
+    except BrokenProcessPool:
+        return get_pool(workers).submit(render_rating_sheet, interview_type, context)
+
+
+class ZipStream:
+    """Write-only sink for zipfile that hands out what was written so far."""
+    def __init__(self):
+        self._chunks = []
+        self._pos = 0
+
+    def write(self, data) -> int:
+        self._chunks.append(bytes(data))
+        self._pos += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._pos
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_rating_sheets(jobs, workers: int = None, errors: list[str] = None, on_progress=None):
+    """
+    Renders RATING-SHEETs in the process pool and yields a ZIP archive in
+    chunks, adding each document as soon as it is finished.
+
+    `jobs` is a list of (file name, interview type, context). At most two
+    renders per worker are in flight, so memory stays bounded by the
+    pool size rather than by the number of applicants. Failures, including
+    renders lost to a crashed worker process, are listed together with the
+    given `errors` in an ERRORS.txt member instead of ending the archive.
+    `on_progress(done)` is called with the number of finished renders.
+    """
+    workers = workers or default_workers()
+    in_flight = 2 * workers
+    sink = ZipStream()
+    errors = list(errors or [])
+    finished = 0
+
+    with zipfile.ZipFile(sink, mode="w", compression=zipfile.ZIP_DEFLATED) as archive:
+        pending = {}
+        queue = iter(jobs)
+        while True:
+            for name, interview_type, context in queue:
+                try:
+                    pending[submit_render(workers, interview_type, context)] = name
+                except Exception as e:
+                    get_log_info("ERROR", "%s: %s", "stream_rating_sheets", name, e)
+                    errors.append(f"{name}: {e}")
+                    finished += 1
+                    continue
+                if len(pending) >= in_flight:
+                    break
+            if not pending:
+                break
+
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name = pending.pop(future)
+                try:
+                    archive.writestr(name, future.result())
+                except Exception as e:
+                    get_log_info("ERROR", "%s: %s", "stream_rating_sheets", name, e)
+                    errors.append(f"{name}: {e}")
+                finished += 1
+            if on_progress is not None:
+                on_progress(finished)
+            yield sink.pop()
+
+        if errors:
+            archive.writestr("ERRORS.txt", "\n".join(errors))
+    yield sink.pop()
@@ -1,13 +1,179 @@
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from flask import request
+
 # ANSI color codes
 RESET = "\033[0m"
 LOG_COLORS = {
     "ERROR": "\033[31m",  # Red
     "APP"  : "\033[33m",  # Yellow
     "CORE" : "\033[34m",  # Blue
+    "QUERY": "\033[35m",  # Magenta
+    "WARN" : "\033[93m",  # Bright yellow
+}
+# get_log_info() types and the level they are logged at
+LOG_TYPE_LEVELS = {
+    "ERROR": logging.ERROR,
+    "QUERY": logging.WARNING,
+    "WARN" : logging.WARNING,
+    "APP"  : logging.INFO,
+    "CORE" : logging.INFO,
+}
+LEVEL_TYPES = {
+    logging.CRITICAL : "ERROR",
+    logging.ERROR    : "ERROR",
+    logging.WARNING  : "WARN",
+    logging.INFO     : "APP",
+    logging.DEBUG    : "CORE",
 }
+LOG_QUEUE_SIZE = 10000
+
+log = logging.getLogger("hrmpsb")
+
+# id of the request being handled, attached to every record logged while handling it
+REQUEST_ID = ContextVar("request_id", default=None)
+
+
+def get_log_info(log_type="ERROR", msg="ERROR FAULT AT THIS METHOD", func_name="MAIN", *args):
+    """
+    Logs `msg % args` on the "hrmpsb" logger at the level of `log_type`
+    (ERROR, WARN, QUERY, APP, CORE). Formatting is deferred until a handler
+    actually emits the record.
+    """
+    level = LOG_TYPE_LEVELS.get(log_type.upper(), logging.INFO)
+    if log.isEnabledFor(level):
+        log.log(level, msg, *args, extra={"log_type" : log_type.upper(), "func_name" : func_name}, stacklevel=2)
+
+
+class RequestIdFilter(logging.Filter):
+    def filter(self, record: logging.LogRecord) -> bool:
+        if not hasattr(record, "request_id"):
+            record.request_id = REQUEST_ID.get()
+        return True
+
+
+class ColorFormatter(logging.Formatter):
+    """The original console format: `[TYPE ] message (function)`, colored by type."""
+    def __init__(self, color: bool = True):
+        super().__init__()
+        self.color = color
+
+    def format(self, record: logging.LogRecord) -> str:
+        log_type = getattr(record, "log_type", None) or LEVEL_TYPES.get(record.levelno, "APP")
+        # pad to 5 chars (e.g. [ERROR], [CORE ], [APP  ])
+        line = f"[{log_type:<5}] {record.getMessage()} ({getattr(record, 'func_name', record.funcName)})"
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            line = f"{line}\n{record.exc_text}"
+        if not self.color:
+            return line
+        return f"{LOG_COLORS.get(log_type, '')}{line}{RESET}"
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line; request_id and duration_ms are included when set."""
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts"         : datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level"      : record.levelname,
+            "logger"     : record.name,
+            "msg"        : record.getMessage(),
+            "func"       : getattr(record, "func_name", record.funcName),
+            "request_id" : getattr(record, "request_id", None),
+        }
+        if getattr(record, "duration_ms", None) is not None:
+            entry["duration_ms"] = round(record.duration_ms, 2)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to a QueueListener thread, which does the formatting and
+    the I/O. When the bounded queue is full the record is dropped and
+    counted instead of stalling the request thread.
+    """
+    def __init__(self, q: queue.Queue):
+        super().__init__(q)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # the listener runs in this process: the record is passed as is, only
+        # the traceback is rendered now while its frames are still current
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def configure_logging(level: str = "INFO", fmt: str = "console", path: str = None,
+                      queue_size: int = LOG_QUEUE_SIZE) -> logging.handlers.QueueListener:
+    """
+    Sends the "hrmpsb" logger through a NonBlockingQueueHandler to stderr or
+    `path`, as colored console lines or as JSON lines (`fmt="json"`).
+    Returns the started listener; stop() flushes what is still queued.
+    """
+    if fmt not in ("console", "json"):
+        raise ValueError(f"unknown log format {fmt!r} (console or json)")
+    if path:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        target = logging.FileHandler(path, encoding="utf-8")
+    else:
+        target = logging.StreamHandler(sys.stderr)
+    target.setFormatter(JsonFormatter() if fmt == "json" else ColorFormatter(color=not path))
+
+    for handler in list(log.handlers):
+        log.removeHandler(handler)
+    handler = NonBlockingQueueHandler(queue.Queue(maxsize=queue_size))
+    handler.addFilter(RequestIdFilter())
+    log.addHandler(handler)
+    log.setLevel(level.upper() if isinstance(level, str) else level)
+    log.propagate = False
+
+    listener = logging.handlers.QueueListener(handler.queue, target, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def install_request_logging(app, access_log: bool = False):
+    """
+    Gives every request an id (the X-Request-ID header when the client sent
+    one) that is attached to its log records and echoed in the response;
+    with `access_log`, one line per request with its duration.
+    """
+    def start_request():
+        request.environ["hrmpsb.request_started"] = time.perf_counter()
+        request.environ["hrmpsb.request_id"] = REQUEST_ID.set(request.headers.get("X-Request-ID", "")[:64] or os.urandom(8).hex())
+
+    def finish_request(response):
+        token = request.environ.pop("hrmpsb.request_id", None)
+        if token is None:
+            return response
+        request_id = REQUEST_ID.get()
+        response.headers.setdefault("X-Request-ID", request_id)
+        if access_log and log.isEnabledFor(logging.INFO):
+            duration_ms = (time.perf_counter() - request.environ["hrmpsb.request_started"]) * 1000
+            log.info("%s %s %s", request.method, request.full_path.rstrip("?"), response.status_code,
+                     extra={"func_name" : request.endpoint, "duration_ms" : duration_ms})
+        REQUEST_ID.reset(token)
+        return response
 
-def get_log_info(log_type="ERROR", msg="ERROR FAULT AT THIS METHOD", func_name="MAIN"):
-    color = LOG_COLORS.get(log_type.upper(), "")
-    # pad to 5 chars (e.g. [ERROR], [CORE ], [APP  ])
-    label = f"[{log_type:<5}]"
-    print(f"{color}{label} {msg} ({func_name}){RESET}")
\ No newline at end of file
+    app.before_request(start_request)
+    app.after_request(finish_request)
@@ -0,0 +1,121 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from scripts.template_cache import TEMPLATES
+
+
+def fingerprint(folder: str, name: str, *inputs) -> str:
+    """
+    Content address of a rendered document: the template file and its
+    version plus everything that goes into the render context.
+    """
+    entry = TEMPLATES.get(folder, name)
+    payload = json.dumps([folder, name, entry.mtime, inputs], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class DocumentCache:
+    """
+    Size-bounded LRU of rendered documents keyed by fingerprint(), with an
+    optional on-disk tier that survives restarts and is shared by workers.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, directory: str = None, max_disk_bytes: int = 512 * 1024 * 1024):
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._size = 0
+        self.configure(max_bytes, directory, max_disk_bytes)
+
+    def configure(self, max_bytes: int, directory: str = None, max_disk_bytes: int = 512 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.directory = directory
+        self.max_disk_bytes = max_disk_bytes
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with self._lock:
+            self._evict()
+
+    def get(self, key: str):
+        with self._lock:
+            data = self._items.get(key)
+            if data is not None:
+                self._items.move_to_end(key)
+                return data
+        if self.directory:
+            try:
+                with open(self._path(key), "rb") as fp:
+                    data = fp.read()
+                os.utime(self._path(key))     # keeps the disk tier in LRU order
+            except FileNotFoundError:
+                return None
+            self._remember(key, data)
+        return data
+
+    def put(self, key: str, data: bytes):
+        self._remember(key, data)
+        if self.directory:
+            # unique temp file per writer (threads and worker processes), published by rename
+            fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f"{key}.", suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as fp:
+                    fp.write(data)
+                os.replace(tmp, self._path(key))
+            except BaseException:
+                try:
+                    os.remove(tmp)
+                except FileNotFoundError:
+                    pass
+                raise
+            self._prune_disk()
+
+    def get_or_render(self, key: str, render) -> bytes:
+        data = self.get(key)
+        if data is None:
+            data = render()
+            self.put(key, data)
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.docx-cache")
+
+    def _remember(self, key: str, data: bytes):
+        if len(data) > self.max_bytes:
+            return
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._size -= len(old)
+            self._items[key] = data
+            self._size += len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._size > self.max_bytes and self._items:
+            _, data = self._items.popitem(last=False)
+            self._size -= len(data)
+
+    def _prune_disk(self):
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".docx-cache"):
+                stat = entry.stat()
+                entries.append((stat.st_mtime, stat.st_size, entry.path))
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+
+
+DOCUMENTS = DocumentCache()
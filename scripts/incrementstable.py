@@ -1,13 +1,73 @@
+import threading
+from bisect import bisect_left
+from typing import Iterable, Mapping
+
+
+class CompiledIncrements:
+    """
+    Pre-sorted form of an increments table.
+
+    Brackets are ordered by their integer key once; `bounds[i]` holds the
+    running maximum of the MAX values up to bracket i, so the first bracket
+    whose MAX covers a score is found with one bisect.
+    """
+    __slots__ = ("brackets", "bounds", "last")
+
+    def __init__(self, table: Mapping[str, Mapping[str, int]]):
+        if not table:
+            raise ValueError("No increments table provided.")
+        sorted_keys = sorted(table.keys(), key=lambda x: int(x))
+        self.brackets = tuple(int(key) for key in sorted_keys)
+        bounds = []
+        running = None
+        for key in sorted_keys:
+            running = table[key]["MAX"] if running is None else max(running, table[key]["MAX"])
+            bounds.append(running)
+        self.bounds = tuple(bounds)
+        self.last = self.brackets[-1]
+
+    def get_score(self, un_transmutated_score: int) -> int:
+        idx = bisect_left(self.bounds, un_transmutated_score)
+        if idx < len(self.brackets):
+            return self.brackets[idx]
+        return self.last
+
+    def get_scores(self, un_transmutated_scores: Iterable[int]) -> list[int]:
+        bounds, brackets, last = self.bounds, self.brackets, self.last
+        size = len(brackets)
+        result = []
+        for score in un_transmutated_scores:
+            idx = bisect_left(bounds, score)
+            result.append(brackets[idx] if idx < size else last)
+        return result
+
+
 class IncrementsTable:
     """
     Maps a delta score into a transmuted bracket using a JSON table:
       { "1": {"MAX": 2}, "2": {"MAX": 4}, … }
+
+    Compiled tables are cached per table object, so tables handed out by
+    TableHandler are only sorted once per process.
     """
+    _lock = threading.Lock()
+    # id(table) -> (table, CompiledIncrements); the table is kept so its id stays unique
+    _compiled = {}
+    _max_cached = 32
+
+    def compile(self, table: Mapping[str, Mapping[str, int]]) -> CompiledIncrements:
+        entry = self._compiled.get(id(table))
+        if entry is not None and entry[0] is table:
+            return entry[1]
+        compiled = CompiledIncrements(table)
+        with self._lock:
+            if len(self._compiled) >= self._max_cached:
+                self._compiled.clear()
+            self._compiled[id(table)] = (table, compiled)
+        return compiled
+
     def get_score(self, un_transmutated_score: int, table: dict[str, dict[str, int]]) -> int:
-        if not table:
-            raise ValueError("No increments table provided.")
-        sorted_keys = sorted(table.keys(), key=lambda x: int(x))
-        for bracket in sorted_keys:
-            if un_transmutated_score <= table[bracket]["MAX"]:
-                return int(bracket)
-        return int(sorted_keys[-1])
+        return self.compile(table).get_score(un_transmutated_score)
+
+    def get_scores(self, un_transmutated_scores: Iterable[int], table: dict[str, dict[str, int]]) -> list[int]:
+        return self.compile(table).get_scores(un_transmutated_scores)
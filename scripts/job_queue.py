@@ -0,0 +1,91 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from scripts.debugger import get_log_info
+
+
+class JobQueue:
+    """
+    Local background runner for heavy document jobs.
+
+    At most `workers` jobs run at the same time; further jobs wait in the
+    executor's queue, so a burst of exports cannot take every request
+    thread away from evaluators. Job state lives in the database (see
+    DocumentJob in app.py); this class only schedules the work.
+
+    With a heartbeat set, `beat(job_ids)` is called every `interval` seconds
+    with the jobs this process has queued or is running, so other processes
+    can tell them apart from jobs of a process that died.
+    """
+    def __init__(self, workers: int = 1):
+        self.workers = workers
+        self._executor = None
+        self._lock = threading.Lock()
+        self._active = set()
+        self._beat = None
+        self._interval = 15.0
+        self._beating = False
+
+    def heartbeat(self, beat, interval: float):
+        with self._lock:
+            self._beat = beat
+            self._interval = interval
+
+    def submit(self, job_id: str, run, *args):
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="document-job")
+            self._active.add(job_id)
+            if self._beat is not None and not self._beating:
+                self._beating = True
+                threading.Thread(target=self._heartbeat, name="document-job-heartbeat", daemon=True).start()
+            future = self._executor.submit(run, job_id, *args)
+        future.add_done_callback(lambda f: self._finished(job_id, f))
+        return future
+
+    def _finished(self, job_id: str, future):
+        with self._lock:
+            self._active.discard(job_id)
+        if future.exception():
+            get_log_info("ERROR", "job %s: %s", "JobQueue", job_id, future.exception())
+
+    def _heartbeat(self):
+        """Beats while this process has jobs; a later submit() starts it again."""
+        while True:
+            time.sleep(self._interval)
+            with self._lock:
+                if not self._active:
+                    self._beating = False
+                    return
+                job_ids = list(self._active)
+            try:
+                self._beat(job_ids)
+            except Exception as e:
+                get_log_info("ERROR", "heartbeat of %d jobs: %s", "JobQueue", len(job_ids), e)
+
+    def resize(self, workers: int):
+        with self._lock:
+            if workers == self.workers:
+                return
+            if self._executor is not None:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+            self.workers = workers
+
+
+class ProgressThrottle:
+    """Calls `report(done, total)` at most every `interval` seconds, plus once at the end."""
+    def __init__(self, report, total: int, interval: float = 0.5):
+        self.report = report
+        self.total = total
+        self.interval = interval
+        self._last = 0.0
+
+    def __call__(self, done: int):
+        now = time.monotonic()
+        if done >= self.total or now - self._last >= self.interval:
+            self._last = now
+            self.report(done, self.total)
+
+
+JOBS = JobQueue()
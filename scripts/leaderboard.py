@@ -0,0 +1,98 @@
+import threading
+from sortedcontainers import SortedList
+
+
+class Leaderboard:
+    """
+    Ranking of one interview: applicant codes ordered by total score, best
+    first, ties broken by code (the same order as get_interview_ranking).
+
+    `revision` is the Interview.revision the board reflects. Updating one
+    applicant and looking up a rank are O(log n).
+    """
+    def __init__(self, revision: int, totals):
+        self.revision = revision
+        self._lock = threading.Lock()
+        self._totals = dict(totals)
+        self._keys = SortedList((-total, code) for code, total in self._totals.items())
+
+    def __len__(self) -> int:
+        return len(self._totals)
+
+    def update(self, code: str, total: float = None):
+        """Sets an applicant's total; None removes the applicant."""
+        with self._lock:
+            old = self._totals.pop(code, None)
+            if old is not None:
+                self._keys.remove((-old, code))
+            if total is not None:
+                self._totals[code] = total
+                self._keys.add((-total, code))
+
+    def total(self, code: str):
+        return self._totals.get(code)
+
+    def rank(self, code: str):
+        """1-based position of an applicant, None if unknown."""
+        with self._lock:
+            total = self._totals.get(code)
+            if total is None:
+                return None
+            return self._keys.index((-total, code)) + 1
+
+    def top(self, k: int = None) -> list[tuple[str, float]]:
+        """(code, total) of the best `k` applicants, or of all of them."""
+        with self._lock:
+            keys = self._keys[:k] if k is not None else list(self._keys)
+        return [(code, -neg_total) for neg_total, code in keys]
+
+
+class LeaderboardRegistry:
+    """
+    Per-worker leaderboards of the interviews that are being looked at.
+
+    A board is valid while its revision matches Interview.revision. Score
+    changes committed by this worker are applied in place through apply();
+    any other change (another worker, a structure update, a deletion) leaves
+    the revisions apart and the board is rebuilt on its next read.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._boards = {}
+
+    def get(self, interview, load) -> Leaderboard:
+        """Board of an interview; `load()` returns (code, total) pairs when it has to be rebuilt."""
+        board = self._boards.get(interview.id)
+        if board is not None and board.revision == interview.revision:
+            return board
+        board = Leaderboard(interview.revision, load())
+        with self._lock:
+            self._boards[interview.id] = board
+        return board
+
+    def apply(self, iid: str, revision: int, totals: dict):
+        """
+        Applies the totals ({code: total, or None when deleted}) of a commit
+        that moved the interview to `revision`. A board that missed a change
+        in between is dropped instead.
+        """
+        with self._lock:
+            board = self._boards.get(iid)
+            if board is None:
+                return
+            if board.revision + 1 != revision:
+                del self._boards[iid]
+                return
+            for code, total in totals.items():
+                board.update(code, total)
+            board.revision = revision
+
+    def invalidate(self, iid: str = None):
+        with self._lock:
+            if iid is None:
+                self._boards.clear()
+            else:
+                self._boards.pop(iid, None)
+
+
+LEADERBOARDS = LeaderboardRegistry()
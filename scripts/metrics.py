@@ -0,0 +1,169 @@
+import threading
+import time
+from bisect import bisect_left
+from contextvars import ContextVar
+
+from flask import request
+from sqlalchemy import event
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000)
+SIZE_BUCKETS = (1024, 10240, 102400, 1048576, 10485760, 104857600)
+
+# (statement count, seconds in SQL) of the request being handled
+_request_sql = ContextVar("request_sql", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _labels(names, values, extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels: tuple = ()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self._values = {}
+
+    def inc(self, values: tuple = (), amount: float = 1):
+        self._values[values] = self._values.get(values, 0) + amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        for values, total in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.labels, values)} {total}")
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels: tuple = (), buckets: tuple = LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        # label values -> [count per bucket (+Inf last), sum]
+        self._series = {}
+
+    def observe(self, values: tuple, amount: float):
+        series = self._series.get(values)
+        if series is None:
+            series = self._series[values] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, amount)] += 1
+        series[1] += amount
+
+    def render(self) -> list[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for values, (counts, total) in sorted(self._series.items()):
+            cumulative = 0
+            for bound, count in zip((*self.buckets, "+Inf"), counts):
+                cumulative += count
+                le = f'le="{bound}"'
+                lines.append(f"{self.name}_bucket{_labels(self.labels, values, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labels, values)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.labels, values)} {cumulative}")
+        return lines
+
+
+class Metrics:
+    """
+    Per-process request metrics in the Prometheus text format.
+
+    Nothing is hooked into Flask or SQLAlchemy until install() is called,
+    so a disabled instance costs one attribute check where documents are
+    rendered and nothing anywhere else.
+    """
+    def __init__(self):
+        self.enabled = False
+        self._lock = threading.Lock()
+        self.requests = Histogram("hrmpsb_request_duration_seconds", "Request latency by endpoint.",
+                                  ("endpoint", "method", "status"))
+        self.sql_statements = Histogram("hrmpsb_request_sql_statements", "SQL statements executed per request.",
+                                        ("endpoint",), QUERY_BUCKETS)
+        self.sql_seconds = Histogram("hrmpsb_request_sql_seconds", "Time spent in SQL per request.", ("endpoint",))
+        self.response_bytes = Counter("hrmpsb_response_bytes_total", "Response body bytes sent.", ("endpoint",))
+        self.render_seconds = Histogram("hrmpsb_docx_render_seconds", "DOCX render time.", ("document",))
+        self.render_bytes = Histogram("hrmpsb_docx_render_bytes", "Size of rendered DOCX files.", ("document",),
+                                      SIZE_BUCKETS)
+        self.metrics = (self.requests, self.sql_statements, self.sql_seconds, self.response_bytes,
+                        self.render_seconds, self.render_bytes)
+
+    def install(self, app, engine):
+        self.enabled = True
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        event.listen(engine, "before_cursor_execute", self._before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def timed(self, document: str, render):
+        """Wraps a render function returning bytes so its time and output size are recorded."""
+        if not self.enabled:
+            return render
+        def timed_render():
+            started = time.perf_counter()
+            data = render()
+            with self._lock:
+                self.render_seconds.observe((document,), time.perf_counter() - started)
+                self.render_bytes.observe((document,), len(data))
+            return data
+        return timed_render
+
+    def render(self) -> str:
+        with self._lock:
+            return "\n".join(line for metric in self.metrics for line in metric.render()) + "\n"
+
+    def _start_request(self):
+        request.environ["hrmpsb.started"] = time.perf_counter()
+        request.environ["hrmpsb.sql"] = _request_sql.set([0, 0.0])
+
+    def _finish_request(self, response):
+        started = request.environ.get("hrmpsb.started")
+        if started is None:
+            return response
+        elapsed = time.perf_counter() - started
+        endpoint = request.endpoint or "unmatched"
+        statements, sql_time = _request_sql.get() or (0, 0.0)
+        _request_sql.reset(request.environ.pop("hrmpsb.sql"))
+
+        with self._lock:
+            self.requests.observe((endpoint, request.method, response.status_code), elapsed)
+            self.sql_statements.observe((endpoint,), statements)
+            self.sql_seconds.observe((endpoint,), sql_time)
+
+        # streamed bodies (ZIP exports, SSE, send_file) are counted as they are sent
+        if response.content_length is not None:
+            with self._lock:
+                self.response_bytes.inc((endpoint,), response.content_length)
+        else:
+            response.response = self._count_bytes(endpoint, response.response)
+        return response
+
+    def _count_bytes(self, endpoint: str, chunks):
+        sent = 0
+        try:
+            for chunk in chunks:
+                sent += len(chunk)
+                yield chunk
+        finally:
+            with self._lock:
+                self.response_bytes.inc((endpoint,), sent)
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        if _request_sql.get() is not None:
+            conn.info.setdefault("hrmpsb.query_started", []).append(time.perf_counter())
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        stats = _request_sql.get()
+        started = conn.info.get("hrmpsb.query_started")
+        if stats is None or not started:
+            return
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started.pop()
+
+
+METRICS = Metrics()
@@ -0,0 +1,104 @@
+import os
+import re
+import traceback
+from collections import Counter
+from contextvars import ContextVar
+
+from flask import request
+from sqlalchemy import event
+
+from scripts.debugger import get_log_info
+
+STACK_DEPTH = 6
+
+# statements of the request being handled: {shape: count}, plus the shapes already reported
+_request_queries = ContextVar("request_queries", default=None)
+
+_WHITESPACE = re.compile(r"\s+")
+_IN_LIST = re.compile(r"\(\s*\?(?:\s*,\s*\?)+\s*\)")
+_SELECT_LIST = re.compile(r"^SELECT .+? FROM ")
+
+
+def statement_shape(statement: str) -> str:
+    """The statement with whitespace collapsed and `IN (?, ?, ...)` lists of any length folded to `IN (?)`."""
+    return _IN_LIST.sub("(?)", _WHITESPACE.sub(" ", statement).strip())
+
+
+def _short(shape: str) -> str:
+    return _SELECT_LIST.sub("SELECT ... FROM ", shape)[:200]
+
+
+class QueryBudgetExceeded(RuntimeError):
+    pass
+
+
+class QueryGuard:
+    """
+    Development/test guard against per-row queries (N+1 patterns).
+
+    Within a request, every statement is counted by shape. A shape executed
+    `repeats` times is reported once through get_log_info, with the app
+    frames that issued it; a request running more than `budget` statements
+    is reported too, or raises QueryBudgetExceeded when `strict`, which
+    fails the test that made the request.
+    """
+    def __init__(self):
+        self.enabled = False
+        self.repeats = 10
+        self.budget = None
+        self.strict = False
+        self._root = None
+
+    def install(self, app, engine, repeats: int = 10, budget: int = None, strict: bool = False):
+        self.enabled = True
+        self.repeats = repeats
+        self.budget = budget
+        self.strict = strict
+        self._root = app.root_path
+        app.before_request(self._start_request)
+        app.after_request(self._finish_request)
+        event.listen(engine, "after_cursor_execute", self._after_cursor_execute)
+
+    def _start_request(self):
+        request.environ["hrmpsb.queries"] = _request_queries.set((Counter(), set()))
+
+    def _finish_request(self, response):
+        token = request.environ.pop("hrmpsb.queries", None)
+        if token is None:
+            return response
+        shapes, _ = _request_queries.get()
+        _request_queries.reset(token)
+
+        total = sum(shapes.values())
+        if self.budget is not None and total > self.budget:
+            worst, count = shapes.most_common(1)[0]
+            msg = (f"{request.method} {request.path}: {total} statements, budget {self.budget} "
+                   f"(most repeated, {count}x: {_short(worst)})")
+            if self.strict:
+                raise QueryBudgetExceeded(msg)
+            get_log_info("QUERY", msg, request.endpoint)
+        return response
+
+    def _after_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        state = _request_queries.get()
+        if state is None:
+            return
+        shapes, reported = state
+        shape = statement_shape(statement)
+        shapes[shape] += 1
+        if shapes[shape] >= self.repeats and shape not in reported:
+            reported.add(shape)
+            get_log_info("QUERY", f"{request.method} {request.path}: same statement {self.repeats}x, "
+                                  f"likely a query per row: {_short(shape)}\n{self._app_stack()}", request.endpoint)
+
+    def _app_stack(self) -> str:
+        """The innermost app frames of the current stack (no library frames, not this module)."""
+        frames = [frame for frame in traceback.extract_stack()
+                  if frame.filename.startswith(self._root)
+                  and "site-packages" not in frame.filename
+                  and os.path.abspath(frame.filename) != os.path.abspath(__file__)]
+        return "".join(f"    {frame.filename}:{frame.lineno} in {frame.name}\n      {frame.line}\n"
+                       for frame in frames[-STACK_DEPTH:]).rstrip()
+
+
+QUERY_GUARD = QueryGuard()
@@ -0,0 +1,67 @@
+import json
+import queue
+import threading
+
+HEARTBEAT_SECONDS = 15.0
+SUBSCRIBER_BACKLOG = 100
+
+
+class RankingEvents:
+    """
+    Per-worker publish/subscribe of ranking changes, one channel per
+    interview. Every subscriber (an open admin page) gets its own bounded
+    queue; a subscriber that falls behind gets a single "reload" event
+    instead of an unbounded backlog.
+    """
+    def __init__(self, backlog: int = SUBSCRIBER_BACKLOG):
+        self.backlog = backlog
+        self._lock = threading.Lock()
+        self._subscribers = {}
+
+    def subscribe(self, iid: str) -> queue.Queue:
+        q = queue.Queue(maxsize=self.backlog)
+        with self._lock:
+            self._subscribers.setdefault(iid, set()).add(q)
+        return q
+
+    def unsubscribe(self, iid: str, q: queue.Queue):
+        with self._lock:
+            subscribers = self._subscribers.get(iid)
+            if subscribers is not None:
+                subscribers.discard(q)
+                if not subscribers:
+                    del self._subscribers[iid]
+
+    def has_subscribers(self, iid: str) -> bool:
+        return bool(self._subscribers.get(iid))
+
+    def publish(self, iid: str, event: str, data: dict, event_id=None):
+        with self._lock:
+            subscribers = list(self._subscribers.get(iid, ()))
+        for q in subscribers:
+            try:
+                q.put_nowait((event, data, event_id))
+            except queue.Full:
+                with q.mutex:
+                    q.queue.clear()
+                q.put_nowait(("reload", {}, event_id))
+
+    def stream(self, iid: str, heartbeat: float = HEARTBEAT_SECONDS):
+        """Server-Sent Events for one subscriber, until the client goes away."""
+        q = self.subscribe(iid)
+        try:
+            yield "retry: 5000\n\n"
+            while True:
+                try:
+                    event, data, event_id = q.get(timeout=heartbeat)
+                except queue.Empty:
+                    # comment line; also how a closed connection is noticed
+                    yield ": keep-alive\n\n"
+                    continue
+                head = f"id: {event_id}\n" if event_id is not None else ""
+                yield f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+        finally:
+            self.unsubscribe(iid, q)
+
+
+EVENTS = RankingEvents()
@@ -0,0 +1,139 @@
+import json
+import os
+import threading
+from numbers import Number
+from scripts.table_handler import freeze
+from scripts.path import JSON_PATH
+from scripts.debugger import get_log_info
+
+STRUCT_FIELDS = ("eval_struct", "app_struct", "weight_struct")
+# struct_json/ file holding the default structure of new interviews, per column
+STRUCT_FILES = {
+    "eval_struct"   : "eval_struct.json",
+    "app_struct"    : "applicant_struct.json",
+    "weight_struct" : "weight_struct.json",
+}
+
+
+class StructCache:
+    """
+    Parse-once cache for the JSON structure columns of an interview
+    (eval_struct, app_struct, weight_struct).
+
+    Entries are keyed by interview id and field and remember the raw text
+    they were parsed from, which acts as the content version: when the
+    column changes the entry is re-parsed on the next access. The parsed
+    structures are frozen so they can be shared between requests.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (interview id, field) -> (raw text, frozen structure)
+        self._entries = {}
+
+    def get(self, interview, field: str = "eval_struct"):
+        if field not in STRUCT_FIELDS:
+            raise KeyError(f"{field} is not an interview structure column")
+        raw = getattr(interview, field)
+        key = (interview.id, field)
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == raw:
+            return entry[1]
+        parsed = freeze(json.loads(raw))
+        with self._lock:
+            self._entries[key] = (raw, parsed)
+        return parsed
+
+    def invalidate(self, iid: str = None):
+        """Drops the cached structures of one interview, or of all of them."""
+        with self._lock:
+            if iid is None:
+                self._entries.clear()
+                return
+            for field in STRUCT_FIELDS:
+                self._entries.pop((iid, field), None)
+
+
+STRUCTS = StructCache()
+
+
+def structure_problem(field: str, struct) -> str:
+    """Why a default structure ({interview type: structure}) is unusable, or None when it is fine."""
+    if not isinstance(struct, dict) or not struct:
+        return "not a non-empty object"
+    for interview_type, spec in struct.items():
+        if not isinstance(spec, dict):
+            return f"{interview_type}: not an object"
+        if field == "weight_struct":
+            for key in ("education", "experience", "training"):
+                if not isinstance(spec.get(key), Number):
+                    return f"{interview_type}: {key} is not a number"
+            continue
+        for name, item in spec.items():
+            if not isinstance(item, dict):
+                return f"{interview_type}/{name}: not an object"
+            if field == "eval_struct":
+                category = item.get("CATEGORY")
+                if not isinstance(category, dict) or not all(isinstance(v, Number) for v in category.values()):
+                    return f"{interview_type}/{name}: CATEGORY must map criteria to numbers"
+                keys = ("TOTAL", "WEIGHT")
+            else:
+                keys = ("WEIGHT", "MAX_SCORE")
+                if not isinstance(item.get("LABEL"), str):
+                    return f"{interview_type}/{name}: LABEL is not a string"
+            for key in keys:
+                if not isinstance(item.get(key), Number):
+                    return f"{interview_type}/{name}: {key} is not a number"
+    return None
+
+
+class DefaultStructures:
+    """
+    Default eval/app/weight structures copied into new interviews.
+
+    Each struct_json/ file is read and validated once per process, on first
+    use; a missing or invalid file falls back to the built-in `defaults`
+    with an error logged. The files are never written, so any number of
+    workers can share them. Structures are handed out frozen, together
+    with the JSON text stored in the interview columns.
+    """
+    def __init__(self, defaults: dict, root: str = JSON_PATH):
+        self.defaults = defaults
+        self.root = root
+        self._lock = threading.Lock()
+        # field -> (frozen {type: structure}, {type: JSON text})
+        self._loaded = {}
+
+    def get(self, field: str):
+        return self._load(field)[0]
+
+    def column(self, field: str, interview_type: str) -> str:
+        """JSON text of one interview type's structure, None when the type has none."""
+        return self._load(field)[1].get(interview_type)
+
+    def _load(self, field: str):
+        entry = self._loaded.get(field)
+        if entry is not None:
+            return entry
+        with self._lock:
+            entry = self._loaded.get(field)
+            if entry is None:
+                struct = self._read(field)
+                entry = self._loaded[field] = (freeze(struct), {key: json.dumps(value)
+                                                                for key, value in struct.items() if value})
+        return entry
+
+    def _read(self, field: str) -> dict:
+        path = os.path.join(self.root, STRUCT_FILES[field])
+        try:
+            with open(path, encoding="utf-8") as fp:
+                struct = json.load(fp)
+        except FileNotFoundError:
+            return self.defaults[field]
+        except (OSError, ValueError) as e:
+            get_log_info("ERROR", "%s: %s, using the built-in structure", "DefaultStructures", path, e)
+            return self.defaults[field]
+        problem = structure_problem(field, struct)
+        if problem is not None:
+            get_log_info("ERROR", "%s: %s, using the built-in structure", "DefaultStructures", path, problem)
+            return self.defaults[field]
+        return struct
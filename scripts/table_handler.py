@@ -1,4 +1,8 @@
 import json
+import os
+import threading
+import time
+from types import MappingProxyType
 from scripts.path import TABLE_PATH, TRANSMUTATION_PATH
 
 PATHS = {
@@ -6,17 +10,92 @@ PATHS = {
     "increments": TRANSMUTATION_PATH
 }
 
-class TableHandler:
+# Seconds between two stat() checks of the same file. Inside that window a
+# cached table is handed out without touching the disk at all.
+CHECK_INTERVAL = 2.0
+
+
+def freeze(data):
     """
-    Loads JSON files from either:
-      - <cwd>/tables/<stype>.json
-      - <cwd>/increments_transmutation/<stype>.json
+    Recursively converts dicts/lists into read-only MappingProxyType/tuples
+    so a cached table can be shared between requests and threads.
+    """
+    if isinstance(data, dict):
+        return MappingProxyType({key: freeze(val) for key, val in data.items()})
+    if isinstance(data, list):
+        return tuple(freeze(val) for val in data)
+    return data
+
+
+class TableRegistry:
+    """
+    Process-wide cache of the JSON lookup tables.
+
+    Each file is parsed once and kept as an immutable mapping together with
+    its mtime. A cached entry is revalidated with a single stat() at most
+    every `check_interval` seconds; `reload()` drops entries explicitly.
     """
-    def parse_table(self, t_type: str = "table", s_type: str = "education") -> dict:
-        path = f"{PATHS[t_type]}/{s_type}.json"
+    def __init__(self, check_interval: float = CHECK_INTERVAL):
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        # (t_type, s_type) -> [mtime_ns, last_checked, table]
+        self._entries = {}
+
+    def get(self, t_type: str = "table", s_type: str = "education"):
+        key = (t_type, s_type)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry[1] < self.check_interval:
+            return entry[2]
+
+        with self._lock:
+            entry = self._entries.get(key)
+            path = f"{PATHS[t_type]}/{s_type}.json"
+            try:
+                mtime = os.stat(path).st_mtime_ns
+            except FileNotFoundError:
+                mtime = None
+
+            if entry is not None and entry[0] == mtime:
+                entry[1] = now
+                return entry[2]
+
+            table = freeze(self._load(path)) if mtime is not None else MappingProxyType({})
+            self._entries[key] = [mtime, now, table]
+            return table
+
+    def reload(self, t_type: str = None, s_type: str = None):
+        """Forgets cached tables; with no arguments every table is dropped."""
+        with self._lock:
+            if t_type is None:
+                self._entries.clear()
+                return
+            for key in list(self._entries):
+                if key[0] == t_type and (s_type is None or key[1] == s_type):
+                    del self._entries[key]
+
+    @staticmethod
+    def _load(path: str) -> dict:
         try:
             with open(path, encoding="utf-8") as fp:
                 return json.load(fp)
         except FileNotFoundError:
-            # missing file → empty dict
+            # removed between stat() and open()
             return {}
+
+
+TABLES = TableRegistry()
+
+
+class TableHandler:
+    """
+    Loads JSON files from either:
+      - <cwd>/tables/<stype>.json
+      - <cwd>/increments_transmutation/<stype>.json
+
+    Tables come from the shared TABLES registry, so repeated calls do not
+    re-read the file. The returned mapping is read-only.
+    """
+    def parse_table(self, t_type: str = "table", s_type: str = "education") -> MappingProxyType:
+        # missing file → empty mapping
+        return TABLES.get(t_type, s_type)
@@ -0,0 +1,116 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+from io import BytesIO
+from docxtpl import DocxTemplate
+from jinja2 import Environment
+from scripts.path import DOC_PATH
+from scripts.table_handler import CHECK_INTERVAL
+
+
+class BoundedMemo:
+    """Small thread-safe LRU keyed by (large) XML strings."""
+    def __init__(self, size: int = 8):
+        self.size = size
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+
+    def get(self, key, build):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+                return value
+        value = build(key)
+        with self._lock:
+            self._items[key] = value
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+        return value
+
+
+class TemplateEnvironment(Environment):
+    """
+    Jinja environment that keeps the templates compiled from XML strings,
+    so rendering the same template XML twice compiles it only once.
+    """
+    def __init__(self, size: int = 8):
+        super().__init__()
+        self._compiled = BoundedMemo(size)
+
+    def from_string(self, source, globals=None, template_class=None):
+        if globals is not None or template_class is not None:
+            return super().from_string(source, globals, template_class)
+        return self._compiled.get(source, super().from_string)
+
+
+class TemplateEntry:
+    """
+    One file under doc_template/, held in memory with the work docxtpl does
+    before rendering (patched XML, compiled Jinja templates).
+    """
+    def __init__(self, path: str, mtime: int, data: bytes):
+        self.path = path
+        self.mtime = mtime
+        self.data = data
+        self.jinja_env = TemplateEnvironment()
+        self._patched = BoundedMemo()
+        self.checked = time.monotonic()
+
+    def template(self) -> "CachedDocxTemplate":
+        """Fresh DocxTemplate for one request."""
+        return CachedDocxTemplate(self)
+
+
+class CachedDocxTemplate(DocxTemplate):
+    """DocxTemplate that shares patched XML and compiled templates through its TemplateEntry."""
+    def __init__(self, entry: TemplateEntry):
+        super().__init__(BytesIO(entry.data))
+        self.entry = entry
+
+    def patch_xml(self, src_xml):
+        return self.entry._patched.get(src_xml, super().patch_xml)
+
+    def render(self, context, jinja_env=None, autoescape=False):
+        super().render(context, jinja_env or self.entry.jinja_env, autoescape)
+
+
+class TemplateCache:
+    """
+    Per-worker cache of the .docx templates, keyed by folder and file name
+    (e.g. ("CAR", "teacher 1_CAR_with_name")). Files are read once and
+    re-read when their mtime changes; the mtime is checked at most every
+    `check_interval` seconds.
+    """
+    def __init__(self, root: str = DOC_PATH, check_interval: float = CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, folder: str, name: str) -> TemplateEntry:
+        key = (folder, name)
+        now = time.monotonic()
+        entry = self._entries.get(key)
+        if entry is not None and now - entry.checked < self.check_interval:
+            return entry
+
+        path = os.path.join(self.root, folder, f"{name}.docx")
+        mtime = os.stat(path).st_mtime_ns
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.mtime == mtime:
+                entry.checked = now
+                return entry
+            with open(path, "rb") as fp:
+                entry = TemplateEntry(path, mtime, fp.read())
+            self._entries[key] = entry
+            return entry
+
+    def reload(self):
+        with self._lock:
+            self._entries.clear()
+
+
+TEMPLATES = TemplateCache()
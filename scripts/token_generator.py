@@ -0,0 +1,28 @@
+import csv
+import io
+import secrets
+
+TOKEN_LENGTH = 8
+# no 0/O or 1/I, so printed tokens can be typed back without guessing
+TOKEN_ALPHABET = "23456789ABCDEFGHJKLMNPQRSTUVWXYZ"
+MAX_TOKENS_PER_BATCH = 500
+
+
+def random_tokens(count: int, exclude=frozenset()) -> set[str]:
+    """`count` distinct random tokens, none of them in `exclude`."""
+    tokens = set()
+    while len(tokens) < count:
+        token = "".join(secrets.choice(TOKEN_ALPHABET) for _ in range(TOKEN_LENGTH))
+        if token not in exclude:
+            tokens.add(token)
+    return tokens
+
+
+def tokens_csv(interview, tokens: list[str]) -> str:
+    """CSV sheet of a token batch, one token per row."""
+    out = io.StringIO()
+    writer = csv.writer(out)
+    writer.writerow(["token", "interview_id", "position", "date"])
+    for token in tokens:
+        writer.writerow([token, interview.id, interview.position_title, interview.date])
+    return out.getvalue()
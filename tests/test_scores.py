@@ -0,0 +1,77 @@
+"""
+refresh_scores() against the per-applicant formula the app used before scores
+were summed in SQL, on seeded synthetic interviews.
+
+    python -m pytest -q tests
+"""
+import json
+import os
+import sys
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+WORKDIR = tempfile.mkdtemp(prefix="hrmpsb-test-")
+# read when app.py is imported
+os.environ["FLASK_SQLALCHEMY_DATABASE_URI"] = f"sqlite:///{os.path.join(WORKDIR, 'test.db')}"
+os.environ["FLASK_WARM_UP"] = "false"
+os.environ["FLASK_TEMPLATE_CACHE_DIR"] = '""'
+sys.path.insert(0, ROOT)
+
+import app as A
+from benchmarks.synthetic import SyntheticData, INTERVIEW_TYPES
+
+
+def legacy_score(applicant, eval_struct) -> tuple[float, float]:
+    """
+    The old calculate_applicant_score: every evaluation's JSON summed section
+    by section, in the order of the JSON. The only change is score_sum() on
+    the section total, which makes the sum independent of that order.
+    """
+    evaluations = A.Evaluation.query.filter_by(interview_id=applicant.interview_id,
+                                               applicant_code=applicant.code).all()
+    baseline = A.calculate_baseline_score(applicant, applicant.interview)
+    total_score = baseline['edu'] + baseline['exp'] + baseline['trn']
+
+    extra = json.loads(applicant.extra_data)
+    eval_score = 0
+    for field in extra.keys():
+        total_score += extra[field]
+
+    if evaluations:
+        for key in eval_struct.keys():
+            total = 0
+            for evaluation in evaluations:
+                for val in json.loads(evaluation.extra_data)[key].values():
+                    total += val
+            total = A.score_sum(total)
+            eval_score += round(((total / eval_struct[key]['TOTAL']) * eval_struct[key]['WEIGHT']) / len(evaluations), 2)
+        total_score += eval_score
+    return total_score, eval_score
+
+
+@pytest.fixture(scope="module")
+def interviews():
+    A.create_app()
+    with A.app.app_context():
+        data = SyntheticData(seed=7)
+        yield [data.populate(interview_type, applicants=60, evaluators=5).id for interview_type in INTERVIEW_TYPES]
+
+
+def test_refresh_scores_matches_legacy_formula(interviews):
+    with A.app.app_context():
+        for iid in interviews:
+            interview = A.db.session.get(A.Interview, iid)
+            eval_struct = A.STRUCTS.get(interview, "eval_struct")
+            applicants = A.Applicant.query.filter_by(interview_id=iid).all()
+            scores = A.refresh_scores(interview, applicants)
+            for applicant in applicants:
+                total_score, eval_score = legacy_score(applicant, eval_struct)
+                assert scores[applicant.code]['eval_score'] == eval_score, applicant.code
+                assert scores[applicant.code]['total_score'] == total_score, applicant.code
+            A.db.session.rollback()
+
+
+def test_section_sums_do_not_depend_on_row_order():
+    assert A.score_sum(0.1 + 0.2 + 0.3) == A.score_sum(0.3 + 0.2 + 0.1)